@@ -55,6 +55,25 @@ async function getStock(symbol) {
     return apiCall(`/api/stock/${symbol}`);
 }
 
+// Get quotes for many symbols in one request.
+// The server answers in columns; this returns { SYMBOL: { latest_value, change, change_pct, date } }
+// (the same fields as getStock). Unknown symbols are left out.
+async function getQuotes(symbols) {
+    if (!symbols || symbols.length === 0) return {};
+    const data = await apiCall(`/api/quotes?symbols=${encodeURIComponent(symbols.join(','))}`);
+    const quotes = {};
+    data.symbols.forEach((symbol, i) => {
+        quotes[symbol] = {
+            symbol,
+            latest_value: data.latest_value[i],
+            change: data.change[i],
+            change_pct: data.change_pct[i],
+            date: data.date[i]
+        };
+    });
+    return quotes;
+}
+
 // Get market movers (gainers/losers)
 async function getMarketMovers() {
     return apiCall('/api/market-movers');
@@ -121,10 +140,82 @@ async function getDSFMAvailableSymbols() {
     return apiCall('/api/dsfm/available-symbols');
 }
 
+// Symbol autocomplete: matches tickers, full column names and company names
+async function searchSymbols(query, limit = 10) {
+    return apiCall(`/api/dsfm/symbols/search?q=${encodeURIComponent(query)}&limit=${limit}`);
+}
+
+// Subscribe to server-pushed market updates (NIFTY, quotes, movers).
+// Uses Server-Sent Events so the backend only sends data when the market
+// data actually changes; falls back to polling if EventSource is missing
+// or the server refuses the stream (e.g. too many open streams).
+// handlers.symbols, if given, returns the symbols to poll quotes for.
+// Returns a function that stops the subscription.
+function subscribeMarket(handlers = {}) {
+    const quotes = {};
+    const dispatch = (event) => {
+        if (event.quotes) {
+            Object.assign(quotes, event.quotes);
+            if (handlers.onQuotes && Object.keys(event.quotes).length > 0) {
+                handlers.onQuotes(event.quotes, quotes);
+            }
+        }
+        if (handlers.onNifty && event.nifty) handlers.onNifty(event.nifty);
+        if (handlers.onMovers && event.movers) handlers.onMovers(event.movers);
+    };
+
+    let timer = null;
+    let source = null;
+
+    const poll = async () => {
+        try {
+            const symbols = handlers.onQuotes && handlers.symbols ? handlers.symbols() : [];
+            const [nifty, movers, polled] = await Promise.all([
+                getNifty(), getMarketMovers(), getQuotes(symbols)
+            ]);
+            // Same quote shape as the stream's
+            const changed = {};
+            Object.entries(polled).forEach(([symbol, q]) => {
+                changed[symbol] = { ltp: q.latest_value, change: q.change, change_pct: q.change_pct };
+            });
+            dispatch({ nifty, movers, quotes: changed });
+        } catch (error) {
+            console.error('Market polling failed:', error);
+        }
+    };
+    const startPolling = () => {
+        if (timer) return;
+        poll();
+        timer = setInterval(poll, 10000);
+    };
+
+    if (typeof EventSource === 'undefined') {
+        startPolling();
+    } else {
+        source = new EventSource(`${API_BASE_URL}/api/stream/market`);
+        source.addEventListener('market', (e) => dispatch(JSON.parse(e.data)));
+        source.onerror = () => {
+            if (source.readyState === EventSource.CLOSED) {
+                // Refused (e.g. 503, too many streams): the browser won't retry
+                console.warn('Market stream unavailable, polling instead');
+                startPolling();
+            } else {
+                console.warn('Market stream disconnected, reconnecting...');
+            }
+        };
+    }
+
+    return () => {
+        if (source) source.close();
+        if (timer) clearInterval(timer);
+    };
+}
+
 // Export API functions
 window.API = {
     getNifty,
     getStock,
+    getQuotes,
     getMarketMovers,
     getPortfolio,
     getNiftyHistory,
@@ -138,6 +229,8 @@ window.API = {
     getDSFMFinbertAnalysis,
     getDSFMLstmAnalysis,
     getDSFMCombinedAnalysis,
-    getDSFMAvailableSymbols
+    getDSFMAvailableSymbols,
+    searchSymbols,
+    subscribeMarket
 };
 
@@ -1,44 +1,354 @@
 # backend/app.py
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request, Response, stream_with_context, g
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+import click
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import os
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tsa.statespace.sarimax import SARIMAX
-from arch import arch_model
+import json
+import time
+import re
+import difflib
+import sqlite3
+import hashlib
+import unicodedata
+from importlib import metadata, util as importlib_util
+import threading
+import subprocess
+import sys
+import statistics
+from collections import OrderedDict
+import multiprocessing
+from concurrent.futures.process import BrokenProcessPool
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait as wait_futures
+from contextlib import closing, contextmanager
+from bisect import bisect_left
+import cProfile
+import pstats
+import io
+import gzip
+from functools import wraps
+from types import SimpleNamespace
 from datetime import timedelta
 from math import sqrt
-from textblob import TextBlob
 from dotenv import load_dotenv
 import requests
-from pmdarima import auto_arima
 import warnings
 warnings.filterwarnings('ignore')
 
-# For LSTM
 try:
+    import orjson
+    ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                      | orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# ===========================================================
+#  MODEL LIBRARIES (imported on first use)
+# ===========================================================
+class DependencyUnavailable(ImportError):
+    """A model library is not installed or failed to import."""
+
+
+class DependencyRegistry:
+    """Heavy model libraries, imported lazily once per process.
+
+    `available()` only checks that the packages are installed (no import),
+    so a worker can serve market routes without paying for TensorFlow,
+    torch or statsmodels; `get()` imports on first use and returns the
+    loader's namespace. A failed import is remembered and reported.
+    """
+
+    def __init__(self):
+        self._entries = {}  # name -> (loader, packages, message when missing)
+        self._locks = {}
+        self._loaded = {}
+        self._errors = {}
+
+    def register(self, name, loader, packages, missing=None):
+        self._entries[name] = (loader, tuple(packages), missing)
+        self._locks[name] = threading.Lock()
+
+    @property
+    def names(self):
+        return list(self._entries)
+
+    @property
+    def packages(self):
+        return sorted({pkg for _, packages, _ in self._entries.values() for pkg in packages})
+
+    def available(self, name):
+        if name in self._loaded:
+            return True
+        if name in self._errors:
+            return False
+        return all(importlib_util.find_spec(pkg) is not None for pkg in self._entries[name][1])
+
+    def get(self, name):
+        try:
+            return self._loaded[name]
+        except KeyError:
+            pass
+        loader, _, missing = self._entries[name]
+        with self._locks[name]:
+            if name not in self._loaded:
+                if name in self._errors:
+                    raise DependencyUnavailable(self._errors[name])
+                try:
+                    with timed(f"import.{name}"):
+                        self._loaded[name] = loader()
+                except ImportError as e:
+                    self._errors[name] = f"{name}: {e}"
+                    print(missing or f"{name} not available: {e}")
+                    raise DependencyUnavailable(self._errors[name]) from e
+        return self._loaded[name]
+
+    def status(self):
+        """name -> "loaded", "installed" (not imported yet), "missing" or the import error."""
+        out = {}
+        for name in self._entries:
+            if name in self._loaded:
+                out[name] = "loaded"
+            elif name in self._errors:
+                out[name] = self._errors[name]
+            else:
+                out[name] = "installed" if self.available(name) else "missing"
+        return out
+
+
+def _import_tensorflow():
     import tensorflow as tf
-    from tensorflow import keras
     from tensorflow.keras.models import Sequential
     from tensorflow.keras.layers import LSTM, Dense, Dropout
-    LSTM_AVAILABLE = True
-except ImportError:
-    LSTM_AVAILABLE = False
-    print("TensorFlow not available, LSTM analysis will be limited")
+    return SimpleNamespace(tf=tf, Sequential=Sequential, LSTM=LSTM, Dense=Dense, Dropout=Dropout)
 
-# For FinBERT
-try:
-    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+def _import_finbert():
     import torch
-    FINBERT_AVAILABLE = True
-except ImportError:
-    FINBERT_AVAILABLE = False
-    print("Transformers not available, FinBERT analysis will use TextBlob fallback")
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    return SimpleNamespace(torch=torch, AutoTokenizer=AutoTokenizer,
+                           AutoModelForSequenceClassification=AutoModelForSequenceClassification)
+
+
+def _import_pmdarima():
+    from pmdarima import auto_arima, ARIMA
+    return SimpleNamespace(auto_arima=auto_arima, ARIMA=ARIMA)
+
+
+def _import_statsmodels():
+    from statsmodels.tsa.api import VAR
+    return SimpleNamespace(VAR=VAR)
+
+
+def _import_arch():
+    from arch import arch_model
+    return SimpleNamespace(arch_model=arch_model)
+
+
+def _import_scipy():
+    from scipy.optimize import minimize
+    from scipy.signal import lfilter
+    return SimpleNamespace(minimize=minimize, lfilter=lfilter)
+
+
+def _import_textblob():
+    from textblob import TextBlob
+    return SimpleNamespace(TextBlob=TextBlob)
+
+
+deps = DependencyRegistry()
+deps.register("tensorflow", _import_tensorflow, ["tensorflow"],
+              "TensorFlow not available, LSTM analysis will be limited")
+deps.register("finbert", _import_finbert, ["transformers", "torch"],
+              "Transformers not available, FinBERT analysis will use TextBlob fallback")
+deps.register("pmdarima", _import_pmdarima, ["pmdarima"])
+deps.register("statsmodels", _import_statsmodels, ["statsmodels"])
+deps.register("arch", _import_arch, ["arch"])
+deps.register("scipy", _import_scipy, ["scipy"])
+deps.register("textblob", _import_textblob, ["textblob"])
 
 app = Flask(__name__)
 CORS(app)
 
+# ===========================================================
+#  INSTRUMENTATION (stage timers, /metrics, ?profile=1)
+# ===========================================================
+# Metrics are per process: with several workers, scrape each one (or sum
+# them in Prometheus). Fits running in pool workers are recorded by the
+# parent from the timings the workers send back.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+PROFILING = os.getenv("PROFILING")  # "1"/"0"; unset allows ?profile=1 only in debug mode
+PROFILE_TOP = 40
+
+
+class Metrics:
+    """Prometheus-style counters and latency histograms."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = {}    # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [count per bucket (+Inf last)..., sum]
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self._histograms.get(key)
+            if h is None:
+                h = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            h[bisect_left(self.buckets, seconds)] += 1
+            h[-1] += seconds
+
+    @staticmethod
+    def _fmt(labels):
+        if not labels:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in labels)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+    def render(self):
+        """Text exposition format, plus a derived cache hit-ratio gauge."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {k: list(v) for k, v in self._histograms.items()}
+
+        lines = []
+        for name in sorted({n for n, _ in counters}):
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f"{name}{self._fmt(labels)} {value}"
+                         for (n, labels), value in sorted(counters.items()) if n == name)
+
+        caches = {}
+        for (n, labels), value in counters.items():
+            if n == "dsfm_cache_requests_total":
+                d = dict(labels)
+                hits, total = caches.get(d["cache"], (0, 0))
+                caches[d["cache"]] = (hits + (value if d["result"] != "miss" else 0), total + value)
+        if caches:
+            lines.append("# TYPE dsfm_cache_hit_ratio gauge")
+            lines.extend(f'dsfm_cache_hit_ratio{{cache="{c}"}} {hits / total:.6f}'
+                         for c, (hits, total) in sorted(caches.items()) if total)
+
+        for name in sorted({n for n, _ in histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (n, labels), h in sorted(histograms.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets + (None,), h[:-1]):
+                    cumulative += count
+                    le = "+Inf" if bound is None else repr(bound)
+                    lines.append(f"{name}_bucket{self._fmt(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{self._fmt(labels)} {h[-1]:.6f}")
+                lines.append(f"{name}_count{self._fmt(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def timed(stage):
+    """Record how long the block takes under dsfm_stage_seconds{stage=...}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe("dsfm_stage_seconds", time.perf_counter() - start, stage=stage)
+
+
+def cache_lookup(cache, result, count=1):
+    """Count cache lookups; result is "hit", "miss" or a kind of hit (e.g. "disk")."""
+    metrics.inc("dsfm_cache_requests_total", count, cache=cache, result=result)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON output (sorted keys, HTTP dates), encoded by orjson when installed.
+
+    orjson writes NumPy arrays and scalars straight to bytes; NaN/inf come
+    out as null instead of the stdlib's invalid NaN tokens.
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, np.ndarray):
+            return o.tolist()  # non-contiguous arrays orjson refuses
+        if isinstance(o, np.generic):
+            return o.item()
+        return DefaultJSONProvider.default(o)
+
+    def _orjson(self, obj, pretty=False):
+        option = ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        with timed("json.serialize"):
+            if orjson is not None and not kwargs:
+                return self._orjson(obj).decode("utf-8")
+            return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        with timed("json.serialize"):
+            body = self._orjson(obj, pretty) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+app.json = TimedJSONProvider(app)
+
+
+def _profiling_allowed():
+    return PROFILING == "1" or (PROFILING is None and app.debug)
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+    if request.args.get("profile") == "1" and _profiling_allowed():
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+@app.after_request
+def _record_request(response):
+    profiler = g.pop("profiler", None)
+    elapsed = time.perf_counter() - g.pop("request_start", time.perf_counter())
+    if profiler is not None:
+        profiler.disable()
+        if not response.is_streamed:
+            out = io.StringIO()
+            out.write(f"{request.method} {request.full_path} -> {response.status_code} "
+                      f"in {elapsed * 1000:.1f} ms\n\n")
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            response = Response(out.getvalue(), status=200, mimetype="text/plain")
+
+    route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+    metrics.observe("dsfm_request_seconds", elapsed,
+                    route=route, method=request.method, status=str(response.status_code))
+    return response
+
+
+@app.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 # ============================
 #  SYMBOL → REAL COMPANY NAME MAP (for news query)
 # ============================
@@ -67,15 +377,22 @@ DATA_CSV = os.path.join(BASE_DIR, "data", "market_data.csv")
 HOLDINGS_CSV = os.path.join(BASE_DIR, "data", "holdings.csv")
 SENTIMENT_CSV = os.path.join(BASE_DIR, "data", "sentiment_sample.csv")
 
+# Columnar snapshot of DATA_CSV (memory-mapped by every worker)
+SNAPSHOT_PRICES = os.path.join(BASE_DIR, "data", "market_data.prices.npy")
+SNAPSHOT_DATES = os.path.join(BASE_DIR, "data", "market_data.dates.npy")
+SNAPSHOT_META = os.path.join(BASE_DIR, "data", "market_data.meta.json")
+
+CACHE_DIR = os.path.join(BASE_DIR, "data", "cache")
+FORECAST_CACHE_DB = os.path.join(CACHE_DIR, "forecasts.sqlite")
+MODEL_STATE_DB = os.path.join(CACHE_DIR, "model_state.sqlite")
+SENTIMENT_CACHE_DB = os.path.join(CACHE_DIR, "sentiment.sqlite")
+
 # ============================
-#  HELPERS
+#  MARKET DATA STORE
 # ============================
-def read_timeseries():
-    """Reads the wide CSV: Date + many tickers."""
-    if not os.path.exists(DATA_CSV):
-        return pd.DataFrame()
-
-    df = pd.read_csv(DATA_CSV)
+def _parse_market_csv(path):
+    """Parse the wide CSV (Date + many tickers) into a clean, filled frame."""
+    df = pd.read_csv(path)
 
     if "Date" not in df.columns:
         return pd.DataFrame()
@@ -89,50 +406,463 @@ def read_timeseries():
     return df
 
 
-def latest_and_prev_prices(df):
-    """Return last and previous row price series and last date."""
-    if df.empty:
-        return pd.Series(dtype=float), pd.Series(dtype=float), None
+def _replace_atomic(path, write):
+    """Write to a temp file next to `path` and rename it into place."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as fh:
+            write(fh)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def write_market_snapshot(stamp, dates, columns, values):
+    """Persist a parsed CSV as .npy price matrix + date array + meta json.
+
+    The meta file is written last and records the CSV stamp it was built
+    from, so a reader never trusts a half-written snapshot.
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    date_ns = np.asarray(dates, dtype="datetime64[ns]").view(np.int64)
+
+    _replace_atomic(SNAPSHOT_PRICES, lambda fh: np.save(fh, values))
+    _replace_atomic(SNAPSHOT_DATES, lambda fh: np.save(fh, date_ns))
+
+    meta = {
+        "source_mtime_ns": stamp[0],
+        "source_size": stamp[1],
+        "rows": int(values.shape[0]),
+        "columns": list(columns),
+    }
+    _replace_atomic(SNAPSHOT_META, lambda fh: fh.write(json.dumps(meta).encode("utf-8")))
+
+
+def read_market_snapshot(stamp):
+    """Memory-map the snapshot if it was built from the CSV at `stamp`.
+
+    Returns (dates, columns, values) or None when the snapshot is missing,
+    stale or inconsistent.
+    """
+    try:
+        with open(SNAPSHOT_META, "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+        if (meta["source_mtime_ns"], meta["source_size"]) != tuple(stamp):
+            return None
+
+        values = np.load(SNAPSHOT_PRICES, mmap_mode="r")
+        date_ns = np.load(SNAPSHOT_DATES)
+    except (OSError, ValueError, KeyError):
+        return None
+
+    columns = meta["columns"]
+    if values.shape != (meta["rows"], len(columns)) or len(date_ns) != meta["rows"]:
+        return None
+
+    return pd.DatetimeIndex(date_ns.view("datetime64[ns]")), columns, values
+
+
+class MarketSnapshot:
+    """One immutable load of market_data.csv.
+
+    `values` is a read-only float64 matrix (rows = dates, cols = symbols),
+    `dates` the matching DatetimeIndex. `version` changes whenever the
+    underlying file changes, so it can be used as a cache key.
+    """
+
+    def __init__(self, version, dates, columns, values):
+        self.version = version
+        self.dates = dates
+        self.columns = list(columns)
+        self.col_index = {c: i for i, c in enumerate(self.columns)}
+        self.values = values
+        self.values.flags.writeable = False
+        self._derived = {}
+        self._derive_lock = threading.RLock()
+
+    @property
+    def empty(self):
+        return len(self.dates) == 0 or not self.columns
+
+    def column(self, symbol):
+        """Read-only price vector for one symbol (None if unknown)."""
+        j = self.col_index.get(symbol)
+        if j is None:
+            return None
+        return self.values[:, j]
+
+    def derive(self, name, compute):
+        """Compute `compute(self)` once per snapshot and memoise it by name."""
+        try:
+            return self._derived[name]
+        except KeyError:
+            pass
+        with self._derive_lock:
+            if name not in self._derived:
+                self._derived[name] = compute(self)
+            return self._derived[name]
+
+    def frame(self):
+        """Date + tickers DataFrame sharing the read-only price matrix."""
+        if self.empty:
+            return pd.DataFrame()
+        df = pd.DataFrame(self.values, columns=self.columns, copy=False)
+        df.insert(0, "Date", self.dates)
+        return df
+
+
+class MarketDataStore:
+    """Process-wide market data cache, reloaded only when the CSV changes.
+
+    The file's (mtime, size) is checked on every access; data is only
+    reloaded when that stamp differs from the one we loaded. Loads go
+    through the columnar .npy snapshot when it matches the CSV (so all
+    workers on a host share the same mapped pages) and fall back to
+    parsing the CSV, which then rebuilds the snapshot.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._snapshot = MarketSnapshot(None, pd.DatetimeIndex([]), [], np.empty((0, 0)))
+
+    @staticmethod
+    def _file_stamp(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    @property
+    def last_modified(self):
+        """Unix mtime of the loaded CSV (None before the first load)."""
+        return None if self._stamp is None else self._stamp[0] / 1e9
+
+    def snapshot(self):
+        stamp = self._file_stamp(self.path)
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    self._snapshot = self._load(stamp)
+                    self._stamp = stamp
+        return self._snapshot
+
+    def _load(self, stamp):
+        empty = MarketSnapshot(None, pd.DatetimeIndex([]), [], np.empty((0, 0)))
+        if stamp is None:
+            return empty
+
+        version = f"{stamp[0]:x}-{stamp[1]:x}"
+        with timed("market_data.snapshot_load"):
+            cached = read_market_snapshot(stamp)
+        if cached is not None:
+            return MarketSnapshot(version, *cached)
+
+        parsed = self.parse_csv()
+        if parsed is None:
+            return empty
+
+        dates, columns, values = parsed
+        try:
+            write_market_snapshot(stamp, dates, columns, values)
+        except OSError as e:
+            print(f"Could not write market data snapshot: {e}")
+        return MarketSnapshot(version, dates, columns, values)
+
+    def parse_csv(self):
+        """Parse the CSV into (dates, columns, float64 matrix), or None."""
+        with timed("market_data.csv_parse"):
+            df = _parse_market_csv(self.path)
+            if df.empty:
+                return None
+
+            columns = [c for c in df.columns if c != "Date"]
+            values = np.ascontiguousarray(
+                df[columns].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+            )
+        return pd.DatetimeIndex(df["Date"]), columns, values
+
+    def rebuild(self):
+        """Force a fresh CSV parse + snapshot write; returns the new snapshot."""
+        with self._lock:
+            stamp = self._file_stamp(self.path)
+            parsed = self.parse_csv() if stamp is not None else None
+            if parsed is None:
+                return None
+            write_market_snapshot(stamp, *parsed)
+            self._stamp = None
+        return self.snapshot()
+
+
+market_store = MarketDataStore(DATA_CSV)
+
+
+@app.cli.command("build-snapshot")
+def build_snapshot_command():
+    """Rebuild the columnar snapshot of market_data.csv."""
+    snap = market_store.rebuild()
+    if snap is None:
+        print(f"No usable market data at {DATA_CSV}")
+        return
+    print(f"Snapshot written: {len(snap.dates)} rows x {len(snap.columns)} symbols "
+          f"(version {snap.version})")
+
+
+# ============================
+#  RESPONSE FORMATS (columnar shape, MessagePack)
+# ============================
+# Chart endpoints return {"dates": [...], "prices": [...]} instead of a
+# list of points with ?shape=columnar, and MessagePack instead of JSON
+# when the client sends Accept: application/msgpack (needs msgpack).
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def response_format():
+    """"msgpack" or "json", negotiated from the Accept header."""
+    if msgpack is None:
+        return "json"
+    best = request.accept_mimetypes.best_match(("application/json",) + MSGPACK_MIMETYPES,
+                                               default="application/json")
+    return "msgpack" if best in MSGPACK_MIMETYPES else "json"
+
+
+def columnar_requested():
+    return request.args.get("shape") == "columnar"
+
+
+def _msgpack_default(o):
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    if isinstance(o, np.generic):
+        return o.item()
+    if hasattr(o, "isoformat"):
+        return o.isoformat()
+    raise TypeError(f"Object of type {type(o).__name__} is not MessagePack serializable")
+
+
+def chart_response(payload, status=200):
+    """jsonify() for chart payloads, or MessagePack when the client asks for it."""
+    if response_format() == "msgpack":
+        with timed("msgpack.serialize"):
+            body = msgpack.packb(payload, default=_msgpack_default)
+        response = Response(body, status=status, mimetype="application/msgpack")
+    else:
+        response = app.json.response(payload)
+        response.status_code = status
+    response.vary.add("Accept")
+    return response
+
 
-    last_row = df.iloc[-1]
-    prev_row = df.iloc[-2] if len(df) >= 2 else df.iloc[-1]
+def points_to_columns(points):
+    """[{"date": d, "price": p}, ...] -> {"dates": [...], "prices": [...]}."""
+    return {"dates": [p["date"] for p in points], "prices": [p["price"] for p in points]}
 
-    last_date = last_row["Date"]
 
-    last = pd.to_numeric(last_row.drop("Date"), errors="coerce")
-    prev = pd.to_numeric(prev_row.drop("Date"), errors="coerce")
+def date_strings(snap):
+    """YYYY-MM-DD string for every row of the snapshot (memoised)."""
+    return snap.derive("date_strings", lambda sn: np.datetime_as_string(sn.dates.values, unit="D"))
 
-    return last, prev, last_date.strftime("%d-%m-%Y")
+
+def price_history(snap, symbol, n=None):
+    """(dates, prices) of the last `n` non-missing prices of `symbol`."""
+    col = snap.column(symbol)
+    if col is None:
+        return [], np.empty(0)
+    mask = ~np.isnan(col)
+    dates, prices = date_strings(snap)[mask], col[mask]
+    if n:
+        dates, prices = dates[-n:], prices[-n:]
+    return dates.tolist(), prices
+
+
+# ============================
+#  CONDITIONAL GET (ETag / Last-Modified per data version)
+# ============================
+# Read-only market routes depend only on market_data.csv and their query
+# string, so a strong ETag of (data version, path, args) identifies the
+# body. A matching If-None-Match gets a 304 before the view runs, and the
+# rendered body (plus a gzip copy) is kept until the data version changes.
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 256))
+GZIP_MIN_BYTES = 1024
+
+
+class ResponseCache:
+    """Rendered 200 bodies for the current data version, LRU-bounded."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = OrderedDict()  # etag -> (body, gzipped body or None, mimetype)
+
+    def get(self, version, tag):
+        with self._lock:
+            if version != self._version:
+                return None
+            entry = self._entries.get(tag)
+            if entry is not None:
+                self._entries.move_to_end(tag)
+            return entry
+
+    def put(self, version, tag, entry):
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            self._entries[tag] = entry
+            self._entries.move_to_end(tag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+
+
+def response_etag(version):
+    """Strong ETag for the current request against data `version`."""
+    args = sorted((k, v) for k, v in request.args.items(multi=True) if k != "profile")
+    raw = json.dumps([version, request.path, args, response_format()], separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def _not_modified(tag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(tag) or request.if_none_match.contains(tag + "-gz")
+    ims = request.if_modified_since
+    return ims is not None and last_modified is not None and int(last_modified) <= ims.timestamp()
+
+
+def versioned_response(view):
+    """Serve `view` with ETag/Last-Modified, 304s and a per-version body cache.
+
+    Only for GET routes whose output is a pure function of the market data
+    and the query string. Error responses are passed through uncached.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = market_store.snapshot().version
+        if version is None or "profiler" in g:
+            return view(*args, **kwargs)
+
+        tag = response_etag(version)
+        last_modified = market_store.last_modified
+        if _not_modified(tag, last_modified):
+            cache_lookup("response", "not_modified")
+            response = Response(status=304)
+        else:
+            entry = response_cache.get(version, tag)
+            if entry is not None:
+                cache_lookup("response", "hit")
+            else:
+                cache_lookup("response", "miss")
+                rendered = app.make_response(view(*args, **kwargs))
+                if rendered.status_code != 200 or rendered.is_streamed:
+                    return rendered
+                body = rendered.get_data()
+                gzipped = gzip.compress(body, 6) if len(body) >= GZIP_MIN_BYTES else None
+                entry = (body, gzipped, rendered.mimetype)
+                response_cache.put(version, tag, entry)
+
+            body, gzipped, mimetype = entry
+            if gzipped is not None and "gzip" in request.accept_encodings:
+                response = Response(gzipped, mimetype=mimetype)
+                response.headers["Content-Encoding"] = "gzip"
+                tag += "-gz"
+            else:
+                response = Response(body, mimetype=mimetype)
+
+        response.set_etag(tag)
+        if last_modified is not None:
+            response.last_modified = last_modified
+        response.headers["Cache-Control"] = "no-cache"
+        response.vary.update(("Accept", "Accept-Encoding"))
+        return response
+
+    return wrapper
+
+
+# ============================
+#  HELPERS
+# ============================
+def read_timeseries():
+    """Reads the wide CSV: Date + many tickers (served from market_store)."""
+    with timed("read_timeseries"):
+        return market_store.snapshot().frame()
+
+
+def latest_and_prev_prices():
+    """Return last and previous row price series and last date."""
+    snap = market_store.snapshot()
+    if snap.empty:
+        return pd.Series(dtype=float), pd.Series(dtype=float), None
+
+    prev_i = -2 if len(snap.dates) >= 2 else -1
+    last = pd.Series(snap.values[-1], index=snap.columns)
+    prev = pd.Series(snap.values[prev_i], index=snap.columns)
+    return last, prev, snap.dates[-1].strftime("%d-%m-%Y")
 
 
 def get_price_series(symbol):
     """Return a clean Date + Price series for one symbol."""
-    df = read_timeseries()
-    if df.empty or symbol not in df.columns:
+    snap = market_store.snapshot()
+    col = snap.column(symbol)
+    if col is None:
         return pd.DataFrame()
 
-    df = df[["Date", symbol]].dropna()
-    df = df.rename(columns={symbol: "Price"})
-    df["Price"] = pd.to_numeric(df["Price"], errors="coerce")
-    df = df.dropna()
+    mask = ~np.isnan(col)
+    return pd.DataFrame({"Date": snap.dates[mask], "Price": col[mask]})
 
-    return df
+
+# ===========================================================
+#  NIFTY PROXY INDEX (derived series, once per data version)
+# ===========================================================
+def _nifty_values(snap):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN rows
+        values = np.nanmean(snap.values, axis=1)
+    values.flags.writeable = False
+    return values
+
+
+def nifty_series(snap):
+    """Equal-weighted NIFTY proxy (mean price across symbols per day), aligned with snap.dates."""
+    return snap.derive("nifty_index", _nifty_values)
+
+
+def weighted_index(snap, weights):
+    """Custom-weighted price index: per-day weighted mean of available prices."""
+    w = np.array([weights.get(c, 0.0) for c in snap.columns], dtype=np.float64)
+    valid = ~np.isnan(snap.values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(valid, snap.values, 0.0) @ w / (valid @ w)
+
+
+def _parse_weights(raw):
+    """'SYM:0.3,SYM2:0.7' -> {symbol: weight}."""
+    weights = {}
+    for part in raw.split(","):
+        sym, _, w = part.partition(":")
+        weights[sym.strip()] = float(w)
+    return weights
 
 
 # ===========================================================
 #  NIFTY API
 # ===========================================================
 @app.route("/api/nifty")
+@versioned_response
 def api_nifty():
-    df = read_timeseries()
-    if df.empty:
+    snap = market_store.snapshot()
+    if snap.empty:
         return jsonify({"error": "No data"}), 404
 
-    df["NIFTY"] = df.drop(columns=["Date"]).mean(axis=1)
-    latest = df.iloc[-1]["NIFTY"]
-    prev = df.iloc[-2]["NIFTY"]
+    index = nifty_series(snap)
+    prev, latest = index[-2], index[-1]
     change_pct = (latest - prev) / prev * 100
-    date = df.iloc[-1]["Date"].strftime("%d-%m-%Y")
+    date = snap.dates[-1].strftime("%d-%m-%Y")
 
     return jsonify({
         "nifty_value": round(latest, 2),
@@ -145,68 +875,432 @@ def api_nifty():
 #  STOCK API (single symbol snapshot)
 # ===========================================================
 @app.route("/api/stock/<symbol>")
+@versioned_response
 def api_stock(symbol):
-    df = read_timeseries()
-    if df.empty or symbol not in df.columns:
+    quotes = market_store.snapshot().derive("quote_table", compute_quote_table)
+    j = quotes["index"].get(symbol)
+    if j is None:
         return jsonify({"error": "Symbol not found"}), 404
 
-    df = df.dropna(subset=[symbol])
-    df["Date"] = pd.to_datetime(df["Date"])
+    return jsonify({
+        "symbol": symbol,
+        "latest_value": round(float(quotes["latest"][j]), 2),
+        "change": round(float(quotes["change"][j]), 2),
+        "change_pct": round(float(quotes["change_pct"][j]), 2),
+        "date": quotes["dates"][j]
+    })
+
+
+# ===========================================================
+#  BATCH QUOTES (watchlists)
+# ===========================================================
+MAX_QUOTE_SYMBOLS = 500
+
+
+def compute_quote_table(snap):
+    """Last and previous valid price of every column, as api_stock reports them.
+
+    Each symbol uses its own last two non-missing prices, so a column that
+    stopped trading still quotes its final move.
+    """
+    valid = ~np.isnan(snap.values)
+    n = len(snap.dates)
+    cols = np.arange(len(snap.columns))
+    has_last = valid.any(axis=0)
+    last_i = n - 1 - np.argmax(valid[::-1], axis=0)
+
+    valid_prev = valid.copy()
+    valid_prev[last_i, cols] = False
+    has_prev = has_last & valid_prev.any(axis=0)
+    prev_i = n - 1 - np.argmax(valid_prev[::-1], axis=0)
+
+    latest = np.where(has_last, snap.values[last_i, cols], np.nan)
+    prev = np.where(has_prev, snap.values[prev_i, cols], np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = latest - prev
+        change_pct = change / prev * 100
+
+    date_strings = snap.dates.strftime("%d-%m-%Y")
+    return {
+        "index": {c: j for j, c in enumerate(snap.columns) if has_last[j] and has_prev[j]},
+        "latest": latest,
+        "change": change,
+        "change_pct": change_pct,
+        "dates": [date_strings[i] for i in last_i],
+    }
+
+
+@app.route("/api/quotes")
+@versioned_response
+def api_quotes():
+    """Latest value/change/pct change for many symbols from one snapshot.
 
-    latest = df.iloc[-1][symbol]
-    prev = df.iloc[-2][symbol]
+    ?symbols=A,B,C. The response is columnar: one array per field, aligned
+    with "symbols"; unknown symbols are listed under "missing".
+    """
+    symbols = list(dict.fromkeys(x.strip() for x in request.args.get("symbols", "").split(",") if x.strip()))
+    if not symbols:
+        return jsonify({"error": "Provide ?symbols=A,B,C"}), 400
+    if len(symbols) > MAX_QUOTE_SYMBOLS:
+        return jsonify({"error": f"At most {MAX_QUOTE_SYMBOLS} symbols per request"}), 400
 
-    change = latest - prev
-    change_pct = change / prev * 100
+    snap = market_store.snapshot()
+    quotes = snap.derive("quote_table", compute_quote_table)
+    found = [sym for sym in symbols if sym in quotes["index"]]
+    idx = np.array([quotes["index"][sym] for sym in found], dtype=np.intp)
 
     return jsonify({
-        "symbol": symbol,
-        "latest_value": round(latest, 2),
-        "change": round(change, 2),
-        "change_pct": round(change_pct, 2),
-        "date": df.iloc[-1]["Date"].strftime("%d-%m-%Y")
+        "version": snap.version,
+        "symbols": found,
+        "latest_value": [_json_number(x) for x in quotes["latest"][idx]],
+        "change": [_json_number(x) for x in quotes["change"][idx]],
+        "change_pct": [_json_number(x) for x in quotes["change_pct"][idx]],
+        "date": [quotes["dates"][j] for j in idx],
+        "missing": [sym for sym in symbols if sym not in quotes["index"]],
     })
 
 
+# ===========================================================
+#  DAILY SNAPSHOT (vectorized cross-section, once per data version)
+# ===========================================================
+def _top_k(scores, k, descending=True):
+    """Indices of the k best scores in order (ties keep column order)."""
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    key = -scores if descending else scores
+    idx = np.argpartition(key, k - 1)[:k] if k < n else np.arange(n)
+    return idx[np.lexsort((idx, key[idx]))]
+
+
+def _window_pct_change(values, days):
+    """Percent change over `days` rows for every column (NaN if unusable)."""
+    n = values.shape[0]
+    if n <= days:
+        return np.full(values.shape[1], np.nan)
+
+    latest = values[-1]
+    past = values[-(days + 1)]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = (latest - past) / past * 100.0
+    pct[past == 0] = np.nan
+    return pct
+
+
+def compute_daily_snapshot(snap):
+    """Last-vs-previous-day stats for the whole universe in one pass.
+
+    Produces JSON-ready gainers/losers/most-bought rows, market breadth,
+    per-sector aggregates (sector = column prefix before the first "_")
+    and the 5d/20d momentum leaderboard.
+    """
+    columns = np.asarray(snap.columns, dtype=object)
+    last = snap.values[-1]
+    prev = snap.values[-2] if len(snap.dates) >= 2 else snap.values[-1]
+
+    valid = ~(np.isnan(last) | np.isnan(prev))
+    symbols = columns[valid]
+    ltp = last[valid]
+    change = ltp - prev[valid]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = change / prev[valid] * 100
+    pct_rounded = np.round(pct, 2)
+
+    def mover_rows(idx):
+        return [
+            {"symbol": symbols[i], "ltp": float(ltp[i]), "pct_change": float(pct_rounded[i])}
+            for i in idx
+        ]
+
+    # ---------- breadth ----------
+    advancers = int(np.count_nonzero(change > 0))
+    decliners = int(np.count_nonzero(change < 0))
+    unchanged = int(len(change) - advancers - decliners)
+
+    # ---------- sectors ----------
+    breadth_pct = np.where(prev[valid] != 0, pct, 0.0)
+    sector_names = np.array(
+        [sym.split("_", 1)[0] if "_" in sym else "OTHER" for sym in symbols], dtype=object
+    )
+    sectors = []
+    if len(sector_names):
+        uniq, first, inverse = np.unique(sector_names, return_index=True, return_inverse=True)
+        n_sec = len(uniq)
+        counts = np.bincount(inverse, minlength=n_sec)
+        sec_adv = np.bincount(inverse, weights=breadth_pct > 0, minlength=n_sec)
+        sec_dec = np.bincount(inverse, weights=breadth_pct < 0, minlength=n_sec)
+        sec_sum = np.bincount(inverse, weights=breadth_pct, minlength=n_sec)
+        for k in np.argsort(first, kind="stable"):
+            sectors.append({
+                "sector": uniq[k],
+                "advancers": int(sec_adv[k]),
+                "decliners": int(sec_dec[k]),
+                "unchanged": int(counts[k] - sec_adv[k] - sec_dec[k]),
+                "avg_move": round(float(sec_sum[k] / counts[k]), 2),
+            })
+
+    # ---------- momentum ----------
+    raw_5d = _window_pct_change(snap.values, 5)
+    raw_20d = _window_pct_change(snap.values, 20)
+    pct_5d = np.round(raw_5d, 2)
+    pct_20d = np.round(raw_20d, 2)
+    raw_score = 2 * raw_5d + raw_20d
+    mom_ok = np.flatnonzero(np.isfinite(raw_score))
+    mom_score = np.round(raw_score[mom_ok], 2)
+    momentum = [
+        {
+            "symbol": columns[mom_ok[i]],
+            "pct_5d": float(pct_5d[mom_ok[i]]),
+            "pct_20d": float(pct_20d[mom_ok[i]]),
+            "momentum_score": float(mom_score[i]),
+        }
+        for i in _top_k(mom_score, 10)
+    ]
+
+    gainers = mover_rows(_top_k(pct_rounded, 10, descending=True))
+    return {
+        "date": snap.dates[-1].strftime("%d-%m-%Y"),
+        "gainers": gainers,
+        "losers": mover_rows(_top_k(pct_rounded, 10, descending=False)),
+        "most_bought": gainers[0] if gainers else None,
+        "breadth": {
+            "advancers": advancers,
+            "decliners": decliners,
+            "unchanged": unchanged,
+            "adv_decl_ratio": (advancers / decliners) if decliners != 0 else None,
+        },
+        "sectors": sectors,
+        "momentum": momentum,
+    }
+
+
+def daily_snapshot():
+    """Daily snapshot for the current market data (None if there is none)."""
+    snap = market_store.snapshot()
+    if snap.empty:
+        return None
+    return snap.derive("daily_snapshot", compute_daily_snapshot)
+
+
 # ===========================================================
 #  MARKET MOVERS (TOP GAINERS / LOSERS)
 # ===========================================================
 @app.route("/api/market-movers")
+@versioned_response
 def api_market_movers():
-    df = read_timeseries()
-    last, prev, last_date = latest_and_prev_prices(df)
-    if last.empty:
+    daily = daily_snapshot()
+    if daily is None:
         return jsonify({"gainers": [], "losers": []})
 
-    movers = []
-    for sym in last.index:
-        if pd.isna(last[sym]) or pd.isna(prev[sym]):
-            continue
+    return jsonify({"date": daily["date"], "gainers": daily["gainers"], "losers": daily["losers"]})
 
-        pct = (last[sym] - prev[sym]) / prev[sym] * 100
-        movers.append({
-            "symbol": sym,
-            "ltp": float(last[sym]),
-            "pct_change": round(pct, 2)
-        })
 
-    movers_df = pd.DataFrame(movers)
-    gainers = movers_df.sort_values("pct_change", ascending=False).head(10).to_dict("records")
-    losers = movers_df.sort_values("pct_change", ascending=True).head(10).to_dict("records")
+# ===========================================================
+#  MARKET STREAM (Server-Sent Events instead of polling)
+# ===========================================================
+STREAM_POLL_SECONDS = 1.0
+STREAM_HEARTBEAT_SECONDS = 15.0
+# Each open stream holds a worker thread for as long as the page is open.
+# Beyond this many per process, clients get a 503 and fall back to polling.
+STREAM_MAX_CLIENTS = int(os.getenv("STREAM_MAX_CLIENTS", 8))
+
+
+def _json_number(x, digits=2):
+    return round(float(x), digits) if np.isfinite(x) else None
+
+
+def compute_stream_payload(snap):
+    """NIFTY, per-symbol quotes and movers for one data version."""
+    index = nifty_series(snap)
+    prev_i = -2 if len(snap.dates) >= 2 else -1
+    last = snap.values[-1]
+    prev = snap.values[prev_i]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = last - prev
+        change_pct = change / prev * 100
+        nifty_pct = (index[-1] - index[prev_i]) / index[prev_i] * 100
+
+    daily = snap.derive("daily_snapshot", compute_daily_snapshot)
+    return {
+        "version": snap.version,
+        "date": snap.dates[-1].strftime("%d-%m-%Y"),
+        "nifty": {
+            "nifty_value": _json_number(index[-1]),
+            "change_pct": _json_number(nifty_pct),
+            "date": snap.dates[-1].strftime("%d-%m-%Y"),
+        },
+        "quotes": {
+            sym: {
+                "ltp": _json_number(last[j]),
+                "change": _json_number(change[j]),
+                "change_pct": _json_number(change_pct[j]),
+            }
+            for j, sym in enumerate(snap.columns)
+        },
+        "movers": {"gainers": daily["gainers"], "losers": daily["losers"]},
+    }
 
-    return jsonify({"date": last_date, "gainers": gainers, "losers": losers})
+
+class MarketBroadcaster:
+    """One watcher thread turns data-version changes into stream payloads.
+
+    Every connected client waits on the same condition, so a new version
+    is computed once and fanned out to all subscribers.
+    """
+
+    def __init__(self, poll=STREAM_POLL_SECONDS):
+        self.poll = poll
+        self._cond = threading.Condition()
+        self._payload = None
+        self._thread = None
+
+    def _ensure_thread(self):
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="market-stream", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                snap = market_store.snapshot()
+                current = self._payload["version"] if self._payload else None
+                if not snap.empty and snap.version != current:
+                    payload = snap.derive("stream_payload", compute_stream_payload)
+                    with self._cond:
+                        self._payload = payload
+                        self._cond.notify_all()
+            except Exception as e:
+                print(f"Market stream error: {e}")
+            time.sleep(self.poll)
+
+    def wait(self, last_version, timeout):
+        """Next payload newer than last_version, or None on timeout."""
+        self._ensure_thread()
+        with self._cond:
+            ready = self._cond.wait_for(
+                lambda: self._payload is not None and self._payload["version"] != last_version,
+                timeout,
+            )
+            return self._payload if ready else None
+
+
+market_broadcaster = MarketBroadcaster()
+
+
+class StreamSlots:
+    """Counts open market streams in this process, up to `limit`."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self.open = 0
+
+    def acquire(self):
+        with self._lock:
+            if self.open >= self.limit:
+                return False
+            self.open += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.open = max(self.open - 1, 0)
+
+
+stream_slots = StreamSlots(STREAM_MAX_CLIENTS)
+
+
+def _json_safe(obj):
+    """Copy of `obj` with NaN/inf floats replaced by None (stdlib json writes invalid tokens)."""
+    if isinstance(obj, float):
+        return obj if np.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _json_safe(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_json_safe(v) for v in obj]
+    return obj
+
+
+def dumps_strict(data):
+    """JSON text for streamed payloads, with NaN/inf written as null."""
+    # orjson already writes non-finite values as null
+    return app.json.dumps(data) if orjson is not None else json.dumps(_json_safe(data))
+
+
+def _sse(event, data, event_id=None):
+    lines = [f"event: {event}"]
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {dumps_strict(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@app.route("/api/stream/market")
+def api_stream_market():
+    """SSE stream of NIFTY, quotes and movers, pushed only on new data.
+
+    The first event carries every quote ("full": true); later events only
+    carry symbols whose quote changed and include movers only when they
+    changed. Once STREAM_MAX_CLIENTS streams are open in this process, new
+    clients get a 503 and poll instead.
+    """
+    if not stream_slots.acquire():
+        response = jsonify({"error": "Too many open market streams, poll instead", "fallback": "poll"})
+        response.headers["Retry-After"] = str(int(STREAM_HEARTBEAT_SECONDS * 4))
+        return response, 503
+
+    def generate():
+        last_version = None
+        last_quotes = {}
+        last_movers = None
+        yield "retry: 5000\n\n"
+        while True:
+            payload = market_broadcaster.wait(last_version, STREAM_HEARTBEAT_SECONDS)
+            if payload is None:
+                yield ": keep-alive\n\n"
+                continue
+
+            quotes = {
+                sym: q for sym, q in payload["quotes"].items() if last_quotes.get(sym) != q
+            }
+            event = {
+                "version": payload["version"],
+                "date": payload["date"],
+                "full": last_version is None,
+                "nifty": payload["nifty"],
+                "quotes": quotes,
+            }
+            if payload["movers"] != last_movers:
+                event["movers"] = payload["movers"]
+
+            yield _sse("market", event, payload["version"])
+            last_version = payload["version"]
+            last_quotes = payload["quotes"]
+            last_movers = payload["movers"]
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    response.call_on_close(stream_slots.release)
+    return response
 
 
 # ===========================================================
 #  PORTFOLIO (synthetic)
 # ===========================================================
 @app.route("/api/portfolio")
+@versioned_response
 def api_portfolio():
     df = read_timeseries()
     if df.empty:
         return jsonify({"holdings": [], "totals": {}})
 
-    last, prev, date = latest_and_prev_prices(df)
+    last, prev, date = latest_and_prev_prices()
 
     rows = []
     for sym in last.index:
@@ -251,73 +1345,614 @@ def api_portfolio():
 #  NIFTY HISTORY FOR CHART
 # ===========================================================
 @app.route("/api/nifty/history")
+@versioned_response
 def api_nifty_history():
-    df = read_timeseries()
-    df["NIFTY"] = df.drop(columns=["Date"]).mean(axis=1)
-    df = df[["Date", "NIFTY"]].tail(200)
-    return jsonify(df.to_dict("records"))
+    """NIFTY proxy history.
 
+    ?from=YYYY-MM-DD / ?to=YYYY-MM-DD bound the date range, ?points=N keeps
+    the last N points (default 200). ?weights=SYM:w,SYM2:w switches from
+    the equal-weighted proxy to a custom-weighted one.
+    """
+    snap = market_store.snapshot()
+    if snap.empty:
+        return jsonify([])
 
-# ===========================================================
-#  DSFM TOP STOCKS  (Sharpe / Volatility)
-# ===========================================================
-def compute_risk_metrics():
-    df = read_timeseries()
-    if df.empty:
-        return []
-
-    df = df.sort_values("Date")
-    price_cols = [c for c in df.columns if c != "Date"]
-
-    trading_days = 252
-    results = []
+    try:
+        points = int(request.args.get("points", 200))
+        start = pd.Timestamp(request.args["from"]) if request.args.get("from") else None
+        end = pd.Timestamp(request.args["to"]) if request.args.get("to") else None
+        weights = _parse_weights(request.args["weights"]) if request.args.get("weights") else None
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query parameter: {e}"}), 400
+
+    if weights is not None:
+        unknown = [sym for sym in weights if sym not in snap.col_index]
+        if unknown:
+            return jsonify({"error": f"Unknown symbols in weights: {', '.join(unknown)}"}), 400
+        index = weighted_index(snap, weights)
+    else:
+        index = nifty_series(snap)
 
-    for sym in price_cols:
-        series = pd.to_numeric(df[sym], errors="coerce").dropna()
-        if len(series) < 300:
-            continue
+    lo = snap.dates.searchsorted(start, side="left") if start is not None else 0
+    hi = snap.dates.searchsorted(end, side="right") if end is not None else len(snap.dates)
+    if points > 0:
+        lo = max(lo, hi - points)
 
-        daily = series.pct_change().dropna()
-        if daily.empty:
-            continue
+    if columnar_requested():
+        return chart_response({"dates": date_strings(snap)[lo:hi].tolist(), "prices": index[lo:hi]})
+    dates = snap.derive("http_dates", lambda sn: [http_date(d) for d in sn.dates])
+    return chart_response([
+        {"Date": d, "NIFTY": v}
+        for d, v in zip(dates[lo:hi], index[lo:hi].tolist())
+    ])
 
-        mean_ret = daily.mean()
-        vol = daily.std()
 
-        annual_return = (1 + mean_ret) ** trading_days - 1
-        annual_vol = vol * sqrt(trading_days)
-        sharpe = (annual_return / annual_vol) if annual_vol != 0 else 0
+# ===========================================================
+#  DSFM TOP STOCKS  (Sharpe / Volatility)
+# ===========================================================
+TRADING_DAYS = 252
+RISK_MIN_PRICES = 300  # full-history ranking needs this much data per symbol
+# Trailing windows in trading days (month, quarter, half-year, 1/2/4 years)
+# the ranking is computed for, each memoised per data version. Other
+# requested windows round down to one of these; the response reports both.
+RISK_WINDOWS = (21, 63, 126, 252, 504, 1008)
+RISK_MIN_WINDOW = RISK_WINDOWS[0]
+
+
+def compute_risk_table(snap, window=None):
+    """Risk metrics for every symbol at once from the price matrix.
+
+    Daily returns are computed for the whole matrix in one go and reduced
+    with NaN masks: annualised return, volatility, Sharpe, Sortino, max
+    drawdown and beta against the equal-weighted NIFTY proxy. With
+    `window` only the trailing `window` returns are used.
+    """
+    values = snap.values if window is None else snap.values[-(window + 1):]
+    min_prices = RISK_MIN_PRICES if window is None else window + 1
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = values[1:] / values[:-1] - 1
+        market = np.nanmean(values, axis=1)
+        market_returns = market[1:] / market[:-1] - 1
+
+        valid = np.isfinite(returns)
+        n = valid.sum(axis=0)
+        r0 = np.where(valid, returns, 0.0)
+
+        mean = r0.sum(axis=0) / n
+        dev = np.where(valid, returns - mean, 0.0)
+        std = np.sqrt((dev ** 2).sum(axis=0) / (n - 1))
+
+        annual_return = (1 + mean) ** TRADING_DAYS - 1
+        annual_vol = std * sqrt(TRADING_DAYS)
+        sharpe = np.where(annual_vol != 0, annual_return / annual_vol, 0.0)
+
+        downside = np.sqrt((np.minimum(r0, 0.0) ** 2).sum(axis=0) / n) * sqrt(TRADING_DAYS)
+        sortino = np.where(downside != 0, annual_return / downside, 0.0)
+
+        running_max = np.fmax.accumulate(values, axis=0)
+        max_drawdown = np.nanmin(values / running_max - 1, axis=0)
+
+        # Beta on rows where both the symbol and the proxy have a return
+        both = valid & np.isfinite(market_returns)[:, None]
+        nb = both.sum(axis=0)
+        rm = np.where(both, market_returns[:, None], 0.0)
+        ri = np.where(both, returns, 0.0)
+        mean_i = ri.sum(axis=0) / nb
+        mean_m = rm.sum(axis=0) / nb
+        cov = (np.where(both, (ri - mean_i) * (rm - mean_m), 0.0)).sum(axis=0) / (nb - 1)
+        var_m = (np.where(both, (rm - mean_m) ** 2, 0.0)).sum(axis=0) / (nb - 1)
+        beta = np.where(var_m > 0, cov / var_m, np.nan)
+
+    eligible = ((~np.isnan(values)).sum(axis=0) >= min_prices) & (n >= 2)
 
+    results = []
+    for j in np.flatnonzero(eligible):
         results.append({
-            "symbol": sym,
-            "annual_return": round(annual_return * 100, 2),
-            "volatility": round(annual_vol * 100, 2),
-            "sharpe": round(sharpe, 2)
+            "symbol": snap.columns[j],
+            "annual_return": round(float(annual_return[j]) * 100, 2),
+            "volatility": round(float(annual_vol[j]) * 100, 2),
+            "sharpe": round(float(sharpe[j]), 2),
+            "sortino": round(float(sortino[j]), 2),
+            "max_drawdown": round(float(max_drawdown[j]) * 100, 2),
+            "beta": round(float(beta[j]), 2) if np.isfinite(beta[j]) else None,
         })
 
     return sorted(results, key=lambda x: x["sharpe"], reverse=True)
 
 
+def compute_risk_metrics(window=None):
+    """Ranked risk metrics for the current data, cached per version and window."""
+    snap = market_store.snapshot()
+    if snap.empty:
+        return []
+    return snap.derive(f"risk_metrics:{window}", lambda sn: compute_risk_table(sn, window))
+
+
 @app.route("/api/dsfm/top-stocks")
+@versioned_response
 def api_dsfm_top_stocks():
-    metrics = compute_risk_metrics()
+    requested = window = request.args.get("window")
+    if window in (None, "", "all"):
+        requested = window = None
+    else:
+        try:
+            requested = window = int(window)
+        except ValueError:
+            return jsonify({"error": "window must be an integer number of trading days"}), 400
+        if window < RISK_MIN_WINDOW:
+            return jsonify({"error": f"window must be at least {RISK_MIN_WINDOW} days"}), 400
+        window = max(w for w in RISK_WINDOWS if w <= window)
+        window = min(window, max(len(market_store.snapshot().dates) - 1, RISK_MIN_WINDOW))
+
+    risk = compute_risk_metrics(window)
     return jsonify({
-        "top_10": metrics[:10],
-        "top_5": metrics[:5],
-        "all_ranked": metrics
+        "window": window or "all",
+        "requested_window": requested or "all",
+        "top_10": risk[:10],
+        "top_5": risk[:5],
+        "all_ranked": risk
     })
 
 
+# ===========================================================
+#  FORECAST CACHE (LRU in memory + SQLite on disk)
+# ===========================================================
+class SqliteStore:
+    """Small base for the on-disk caches under data/cache/.
+
+    Subclasses set SCHEMA (CREATE TABLE statements). Any SQLite error
+    switches the store to memory-only instead of failing the request.
+    """
+
+    SCHEMA = ()
+
+    def __init__(self, path):
+        self.path = path
+        self._disk_ok = True
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        for statement in self.SCHEMA:
+            conn.execute(statement)
+        return conn
+
+    def _disk(self, fn):
+        """Run fn(conn) against the backing store; go memory-only on failure."""
+        if not self._disk_ok:
+            return None
+        try:
+            with closing(self._connect()) as conn, conn:
+                return fn(conn)
+        except sqlite3.Error as e:
+            print(f"{type(self).__name__} disk error, continuing in memory only: {e}")
+            self._disk_ok = False
+            return None
+
+
+class ForecastCache(SqliteStore):
+    """Bounded LRU cache for forecast payloads with an optional TTL.
+
+    Entries live in an in-process OrderedDict and are written through to
+    a SQLite file, so fitted results survive restarts and are shared by
+    every worker on the host. Values must be JSON-serialisable.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS forecasts "
+        "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)",
+    )
+
+    def __init__(self, path, max_entries=256, ttl=None, max_disk_entries=5000):
+        super().__init__(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (created, value)
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _remember(self, key, created, value):
+        with self._lock:
+            self._entries[key] = (created, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._entries.move_to_end(key)
+                    cache_lookup("forecast", "hit")
+                    return entry[1]
+                del self._entries[key]
+
+        row = self._disk(lambda conn: conn.execute(
+            "SELECT value, created FROM forecasts WHERE key = ?", (key,)
+        ).fetchone())
+        if row is None or self._expired(row[1]):
+            cache_lookup("forecast", "miss")
+            return None
+
+        value = json.loads(row[0])
+        self._remember(key, row[1], value)
+        cache_lookup("forecast", "disk")
+        return value
+
+    def put(self, key, value):
+        created = time.time()
+        self._remember(key, created, value)
+
+        def write(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO forecasts (key, value, created) VALUES (?, ?, ?)",
+                (key, json.dumps(value), created),
+            )
+            conn.execute(
+                "DELETE FROM forecasts WHERE key NOT IN "
+                "(SELECT key FROM forecasts ORDER BY created DESC LIMIT ?)",
+                (self.max_disk_entries,),
+            )
+        self._disk(write)
+
+    def latest(self, prefix, suffix):
+        """Most recently stored value whose key starts/ends with the given parts.
+
+        Used to serve a stale forecast (older data version) while a refit
+        is still running. Ignores the TTL on purpose.
+        """
+        with self._lock:
+            for key in reversed(self._entries):
+                if key.startswith(prefix) and key.endswith(suffix):
+                    return self._entries[key][1]
+
+        def like(text):
+            return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+        row = self._disk(lambda conn: conn.execute(
+            "SELECT value FROM forecasts WHERE key LIKE ? ESCAPE '\\' "
+            "ORDER BY created DESC LIMIT 1",
+            (f"{like(prefix)}%{like(suffix)}",),
+        ).fetchone())
+        return json.loads(row[0]) if row is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self._disk(lambda conn: conn.execute("DELETE FROM forecasts"))
+
+
+def _env_number(name, default, cast=int):
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        print(f"Ignoring invalid {name}={value!r}")
+        return default
+
+
+forecast_cache = ForecastCache(
+    FORECAST_CACHE_DB,
+    max_entries=_env_number("FORECAST_CACHE_SIZE", 256),
+    ttl=_env_number("FORECAST_CACHE_TTL", None, float),  # seconds, unset = no expiry
+)
+
+
 # ===========================================================
 #  FORECAST MODELS (ARIMA, SARIMA, GARCH on log-returns)
 # ===========================================================
-forecast_cache = {}
+FORECAST_MODEL_CONFIG = {
+    "arima": {"seasonal": False, "stepwise": True},
+    "sarima": {"seasonal": True, "m": 12, "stepwise": True},
+    "garch": {"vol": "Garch", "p": 1, "q": 1, "mean": "Zero"},
+}
+
+
+def _config_hash():
+    config = dict(FORECAST_MODEL_CONFIG)
+    if GARCH_ENGINE != "arch":
+        config["garch_engine"] = GARCH_ENGINE
+    config = json.dumps(config, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(config).hexdigest()[:12]
+
+
+def forecast_cache_key(symbol, steps, version=None):
+    """Cache key: symbol + market data version + horizon + model config."""
+    if version is None:
+        version = market_store.snapshot().version
+    return f"{symbol}|{version}|{steps}|{_config_hash()}"
+
+
+# ===========================================================
+#  GARCH(1,1) ENGINES
+# ===========================================================
+# GARCH_ENGINE=arch fits through arch_model; GARCH_ENGINE=numpy uses the
+# estimator below. It maximises the same zero-mean GARCH(1,1) likelihood
+# as arch (same backcast, same parameter bounds) with analytic gradients.
+# It fits one series per call. A joint fit over a (T, K) returns matrix was
+# ~10x slower than looping this engine on the bundled data (the joint
+# optimiser runs until the slowest series converges, touching every column
+# each step), so precompute keeps one fit per symbol.
+GARCH_ENGINE = os.getenv("GARCH_ENGINE", "arch")
+if GARCH_ENGINE not in ("arch", "numpy"):
+    print(f"Unknown GARCH_ENGINE '{GARCH_ENGINE}', using arch")
+    GARCH_ENGINE = "arch"
+GARCH_BACKCAST_TAU = 75
+GARCH_MAX_PERSISTENCE = 1.0  # arch allows alpha + beta == 1
+_GARCH_PARAM_NAMES = ["omega", "alpha[1]", "beta[1]"]
+_LOG_2PI = float(np.log(2 * np.pi))
+
+
+def _garch_backcast(r2):
+    """arch's default backcast: exponentially weighted mean of the first r2."""
+    tau = min(GARCH_BACKCAST_TAU, len(r2))
+    w = 0.94 ** np.arange(tau)
+    return float(np.dot(w / w.sum(), r2[:tau]))
+
+
+def garch_variance(r2, backcast, omega, alpha, beta):
+    """sigma2[t] = omega + alpha * r2[t-1] + beta * sigma2[t-1], backcast before t=0.
+
+    The recursion is a first-order IIR filter, so lfilter runs it in C.
+    Returns (sigma2, lagged r2).
+    """
+    lfilter = deps.get("scipy").lfilter
+    r2_lag = np.concatenate(([backcast], r2[:-1]))
+    sigma2, _ = lfilter([1.0], [1.0, -beta], omega + alpha * r2_lag, zi=[beta * backcast])
+    return sigma2, r2_lag
+
+
+def _garch_nll(theta, r2, backcast):
+    """Mean negative log-likelihood and its gradient.
+
+    theta = (omega, persistence, share) with alpha = share * persistence
+    and beta = (1 - share) * persistence, which turns arch's
+    alpha + beta < 1 constraint into box bounds.
+    """
+    omega, p, a = theta
+    alpha, beta = a * p, (1 - a) * p
+    sigma2, r2_lag = garch_variance(r2, backcast, omega, alpha, beta)
+    n = len(r2)
+    nll = 0.5 * np.sum(_LOG_2PI + np.log(sigma2) + r2 / sigma2) / n
+
+    # d sigma2 / d param follows the same filter with a different input
+    g = 0.5 * (1.0 / sigma2 - r2 / sigma2 ** 2) / n
+    sigma2_lag = np.concatenate(([backcast], sigma2[:-1]))
+    filt = ([1.0], [1.0, -beta])
+    lfilter = deps.get("scipy").lfilter
+    d_omega = g @ lfilter(*filt, np.ones(n))
+    d_alpha = g @ lfilter(*filt, r2_lag)
+    d_beta = g @ lfilter(*filt, sigma2_lag)
+    return nll, np.array([d_omega, d_alpha * a + d_beta * (1 - a), (d_alpha - d_beta) * p])
+
+
+class NumpyGarchResult:
+    """The parts of arch's ARCHModelResult that the routes read."""
+
+    def __init__(self, params, loglikelihood, nobs, last_r2, last_sigma2, converged):
+        self.params = pd.Series(params, index=_GARCH_PARAM_NAMES, name="params")
+        self.loglikelihood = loglikelihood
+        self.nobs = nobs
+        self.aic = -2 * loglikelihood + 2 * len(params)
+        self.bic = -2 * loglikelihood + len(params) * np.log(nobs)
+        self.converged = converged
+        self._last_r2 = last_r2
+        self._last_sigma2 = last_sigma2
+
+    def forecast(self, horizon=1, reindex=False):
+        """Analytic h-step variance forecast, shaped like arch's (one row, h.01..h.N)."""
+        omega, alpha, beta = self.params.to_numpy()
+        h1 = omega + alpha * self._last_r2 + beta * self._last_sigma2
+        powers = (alpha + beta) ** np.arange(horizon)
+        variance = h1 * powers + omega * np.concatenate(([0.0], np.cumsum(powers[:-1])))
+        width = len(str(horizon))
+        return SimpleNamespace(variance=pd.DataFrame(
+            [variance], index=[self.nobs - 1], columns=[f"h.{i + 1:0{width}d}" for i in range(horizon)]
+        ))
+
+
+def fit_garch_numpy(r, starting_values=None, maxiter=200):
+    """Zero-mean GARCH(1,1) MLE for one return series.
+
+    The series is rescaled to unit mean square, fitted by L-BFGS-B on the
+    box-constrained parameters, and mapped back. Returns a NumpyGarchResult.
+    """
+    r = np.asarray(r, dtype=np.float64)
+    scale = float(np.sqrt(np.mean(r ** 2))) if len(r) else 0.0
+    if not (np.isfinite(scale) and scale > 0):
+        raise ValueError("Constant returns detected - cannot fit GARCH model")
+    r2 = (r / scale) ** 2
+    backcast = _garch_backcast(r2)
+    if starting_values is not None:
+        omega, alpha, beta = np.asarray(starting_values, dtype=np.float64)
+        p = min(max(alpha + beta, 1e-6), GARCH_MAX_PERSISTENCE)
+        theta0 = (max(omega / scale ** 2, 1e-6), p, min(max(alpha / p, 0.0), 1.0))
+    else:
+        # Small grid like arch's starting-value search; variance targeted at 1
+        grid = [(1 - p, p, alpha / p) for p in (0.5, 0.9, 0.95, 0.98) for alpha in (0.01, 0.05, 0.1, 0.2)]
+        theta0 = min(grid, key=lambda t: _garch_nll(t, r2, backcast)[0])
+
+    opt = deps.get("scipy").minimize(
+        _garch_nll, np.array(theta0), args=(r2, backcast), jac=True, method="L-BFGS-B",
+        bounds=[(1e-8, 10.0), (0.0, GARCH_MAX_PERSISTENCE), (0.0, 1.0)],
+        options={"maxiter": maxiter, "ftol": 1e-12, "gtol": 1e-9},
+    )
+
+    omega, p, a = opt.x
+    alpha, beta = a * p, (1 - a) * p
+    sigma2, _ = garch_variance(r2, backcast, omega, alpha, beta)
+    n = len(r2)
+    llf = -0.5 * np.sum(_LOG_2PI + np.log(sigma2) + r2 / sigma2) - n * np.log(scale)
+    return NumpyGarchResult(
+        [omega * scale ** 2, alpha, beta], float(llf), n,
+        r2[-1] * scale ** 2, sigma2[-1] * scale ** 2, bool(opt.success),
+    )
+
+
+def fit_garch_model(returns, starting_values=None, **fit_kwargs):
+    """Zero-mean GARCH(1,1) through the configured GARCH_ENGINE."""
+    with timed(f"fit.garch.{GARCH_ENGINE}"):
+        if GARCH_ENGINE == "numpy":
+            maxiter = (fit_kwargs.get("options") or {}).get("maxiter", 200)
+            return fit_garch_numpy(np.asarray(returns, dtype=np.float64), starting_values, maxiter)
+        garch_mod = deps.get("arch").arch_model(returns, **FORECAST_MODEL_CONFIG["garch"])
+        return garch_mod.fit(disp="off", starting_values=starting_values, **fit_kwargs)
+
+
+# ===========================================================
+#  MODEL STATE (warm-start incremental refits)
+# ===========================================================
+# Incremental mode keeps each symbol's selected orders and fitted params.
+# When only new bars were appended, models are refitted with the old order
+# and old params as starting values instead of rerunning the order search.
+FORECAST_INCREMENTAL = os.getenv("FORECAST_INCREMENTAL", "1") != "0"
+FORECAST_FULL_SEARCH_EVERY = _env_number("FORECAST_FULL_SEARCH_EVERY", 20)
+FORECAST_AIC_TOLERANCE = _env_number("FORECAST_AIC_TOLERANCE", 10.0, float)  # total AIC
+FORECAST_WARM_MAXITER = 10
+
+
+class ModelStateStore(SqliteStore):
+    """Last fitted state per (symbol, model), keyed by model config."""
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS model_state "
+        "(key TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL NOT NULL)",
+    )
+
+    def _key(self, symbol, model):
+        return f"{symbol}|{model}|{_config_hash()}"
+
+    def get(self, symbol, model):
+        row = self._disk(lambda conn: conn.execute(
+            "SELECT state FROM model_state WHERE key = ?", (self._key(symbol, model),)
+        ).fetchone())
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, symbol, model, state):
+        self._disk(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO model_state (key, state, updated) VALUES (?, ?, ?)",
+            (self._key(symbol, model), json.dumps(state), time.time()),
+        ))
+
+
+model_states = ModelStateStore(MODEL_STATE_DB)
 
 
-def forecast_models(symbol, steps=30):
-    if symbol in forecast_cache:
-        return forecast_cache[symbol]
+def _series_digest(values):
+    return hashlib.sha1(np.ascontiguousarray(values, dtype=np.float64).tobytes()).hexdigest()
 
+
+def _warm_state(symbol, model, values):
+    """Previous state if `values` only appends to what it was fitted on."""
+    if not FORECAST_INCREMENTAL:
+        return None
+    state = model_states.get(symbol, model)
+    if state is None:
+        return None
+
+    n_obs = state["n_obs"]
+    if len(values) < n_obs or _series_digest(values[:n_obs]) != state["digest"]:
+        return None  # history was rewritten, not just extended
+    if state.get("updates", 0) >= FORECAST_FULL_SEARCH_EVERY:
+        return None  # periodic full order search
+    return state
+
+
+def _save_state(symbol, model, values, state, prev):
+    updates = 0
+    if prev is not None:
+        updates = prev["updates"] + (1 if len(values) > prev["n_obs"] else 0)
+    state.update({
+        "n_obs": len(values),
+        "digest": _series_digest(values),
+        "updates": updates,
+    })
+    if FORECAST_INCREMENTAL:
+        model_states.put(symbol, model, state)
+
+
+def fit_arima(symbol, name, r_values):
+    """auto_arima order search, or a warm refit of the remembered order.
+
+    The warm refit is rejected (and the full search rerun) if it fails or
+    its AIC is worse by more than FORECAST_AIC_TOLERANCE than the AIC of
+    the last full search, scaled to the current number of observations.
+    Warm fits never move that baseline, so it cannot drift.
+    """
+    with timed(f"fit.{name}"):
+        return _fit_arima(symbol, name, r_values)
+
+
+def _fit_arima(symbol, name, r_values):
+    prev = _warm_state(symbol, name, r_values)
+    if prev is not None and "search_aic" not in prev:
+        prev = None  # state from before the search baseline was recorded
+    model = None
+    if prev is not None:
+        try:
+            model = deps.get("pmdarima").ARIMA(
+                order=tuple(prev["order"]),
+                seasonal_order=tuple(prev["seasonal_order"]),
+                with_intercept=prev["with_intercept"],
+                start_params=np.asarray(prev["params"]),
+                maxiter=FORECAST_WARM_MAXITER,
+                suppress_warnings=True,
+            ).fit(r_values)
+            baseline = prev["search_aic"] * len(r_values) / prev["search_n_obs"]
+            if model.aic() - baseline > FORECAST_AIC_TOLERANCE:
+                model = None
+        except Exception as e:
+            print(f"Warm {name} refit failed for {symbol}, running full search: {e}")
+            model = None
+
+    if model is None:
+        prev = None
+        model = deps.get("pmdarima").auto_arima(
+            r_values,
+            **FORECAST_MODEL_CONFIG[name],
+            suppress_warnings=True,
+            error_action="ignore"
+        )
+
+    _save_state(symbol, name, r_values, {
+        "order": list(model.order),
+        "seasonal_order": list(model.seasonal_order),
+        "with_intercept": bool(model.with_intercept),
+        "params": [float(x) for x in model.params()],
+        "search_aic": prev["search_aic"] if prev else float(model.aic()),
+        "search_n_obs": prev["search_n_obs"] if prev else len(r_values),
+    }, prev)
+    return model
+
+
+def fit_garch(symbol, name, returns, **fit_kwargs):
+    """GARCH(1,1) fit, warm-started from the last params when history was extended."""
+    prev = _warm_state(symbol, name, returns)
+
+    garch_fit = None
+    if prev is not None:
+        try:
+            garch_fit = fit_garch_model(returns, starting_values=np.asarray(prev["params"]), **fit_kwargs)
+        except Exception as e:
+            print(f"Warm GARCH refit failed for {symbol}: {e}")
+    if garch_fit is None:
+        prev = None
+        garch_fit = fit_garch_model(returns, **fit_kwargs)
+
+    _save_state(symbol, name, returns, {"params": [float(x) for x in garch_fit.params]}, prev)
+    return garch_fit
+
+
+def compute_forecast(symbol, steps=30):
+    """Fit ARIMA/SARIMA/GARCH for one symbol and build the forecast payload."""
     s = get_price_series(symbol)
     if s.empty or len(s) < 2:
         return None
@@ -337,33 +1972,19 @@ def forecast_models(symbol, steps=30):
     r_values = returns.values
 
     # ---------- ARIMA ----------
-    arima_model = auto_arima(
-        r_values,
-        seasonal=False,
-        stepwise=True,
-        suppress_warnings=True,
-        error_action="ignore"
-    )
+    arima_model = fit_arima(symbol, "arima", r_values)
     arima_r = arima_model.predict(n_periods=steps)
     arima_prices = prices.iloc[-1] * np.exp(np.cumsum(arima_r))
     arima_prices = np.asarray(arima_prices)
 
     # ---------- SARIMA ----------
-    sarima_model = auto_arima(
-        r_values,
-        seasonal=True,
-        m=12,
-        stepwise=True,
-        suppress_warnings=True,
-        error_action="ignore"
-    )
+    sarima_model = fit_arima(symbol, "sarima", r_values)
     sarima_r = sarima_model.predict(n_periods=steps)
     sarima_prices = prices.iloc[-1] * np.exp(np.cumsum(sarima_r))
     sarima_prices = np.asarray(sarima_prices)
 
     # ---------- GARCH ----------
-    garch_mod = arch_model(r_values, vol="Garch", p=1, q=1, mean="Zero")
-    garch_fit = garch_mod.fit(disp="off")
+    garch_fit = fit_garch(symbol, "garch", r_values)
 
     # Forecast variance specific to the stock
     garch_forecast = garch_fit.forecast(horizon=steps)
@@ -380,7 +2001,7 @@ def forecast_models(symbol, steps=30):
 
     direction = "UP" if len(arima_prices) > 0 and arima_prices[-1] > prices.iloc[-1] else "DOWN"
 
-    forecast_cache[symbol] = {
+    result = {
         "arima": [
             {"date": d.strftime("%Y-%m-%d"), "price": float(p)}
             for d, p in zip(future_dates, arima_prices)
@@ -395,22 +2016,553 @@ def forecast_models(symbol, steps=30):
         ],
         "direction": direction
     }
-    return forecast_cache[symbol]
+    return result
+
+
+# ===========================================================
+#  FORECAST PRECOMPUTE SCHEDULER (process pool)
+# ===========================================================
+def _forecast_worker(symbol, steps):
+    """Runs in a pool process: fit one symbol, caching is done by the parent.
+
+    Returns (forecast or None, fit seconds).
+    """
+    start = time.perf_counter()
+    result = compute_forecast(symbol, steps)
+    return result, time.perf_counter() - start
+
+
+class ForecastScheduler:
+    """Warms forecast_cache for every symbol whenever market data changes.
+
+    A watcher thread polls market_store; on a new data version every
+    column is queued on a ProcessPoolExecutor and results are written to
+    forecast_cache as they finish. Requests can ask whether a fit is in
+    flight instead of blocking on it.
+
+    A pool whose worker died (e.g. OOM-killed) is replaced on the next
+    submit. Fits that raised are retried once `retry_after` seconds have
+    passed; only a fit that returned no forecast is remembered as empty.
+    """
+
+    def __init__(self, steps=30, interval=60, workers=None, retry_after=60):
+        self.steps = steps
+        self.interval = interval
+        self.workers = workers
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._pool = None
+        self._inflight = {}   # cache key -> Future
+        self._empty = set()   # cache keys whose fit produced no forecast
+        self._failed = {}     # cache key -> (monotonic time, error message, symbol, steps)
+        self._version = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _ensure_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: the parent runs Flask/watcher threads, forking those is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _discard_pool(self, pool):
+        """Drop `pool` (broken) so the next submit starts a fresh one."""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        print("Forecast pool is broken (a worker died); starting a new one")
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def start(self):
+        if self.running:
+            return
+        self._ensure_pool()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="forecast-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _watch(self):
+        while not self._stop.is_set():
+            try:
+                self.warm()
+            except Exception as e:
+                print(f"Forecast scheduler error: {e}")
+            self._stop.wait(self.interval)
+
+    def warm(self):
+        """Queue every symbol of the current data version; returns the futures."""
+        snap = market_store.snapshot()
+        if snap.empty:
+            return []
+        if snap.version == self._version:
+            return self._retry_failed(snap.version)
+        if self._version is not None:
+            with self._lock:
+                self._empty.clear()
+                self._failed.clear()
+        self._version = snap.version
+
+        futures = []
+        for symbol in snap.columns:
+            fut = self.submit(symbol, self.steps, version=snap.version)
+            if fut is not None:
+                futures.append(fut)
+        return futures
+
+    def _retry_failed(self, version):
+        """Requeue fits of this version whose retry delay has passed."""
+        with self._lock:
+            due = [(symbol, steps) for key, (_, _, symbol, steps) in list(self._failed.items())
+                   if self._failure(key) is None]
+        return [fut for fut in (self.submit(sym, steps, version=version) for sym, steps in due)
+                if fut is not None]
+
+    def submit(self, symbol, steps=30, version=None):
+        """Queue one fit unless it is cached, in flight, known to be empty
+        or failed less than `retry_after` seconds ago."""
+        key = forecast_cache_key(symbol, steps, version)
+        if forecast_cache.get(key) is not None:
+            return None
+
+        for _ in range(2):
+            pool = self._ensure_pool()
+            with self._lock:
+                if key in self._inflight or key in self._empty or self._failure(key):
+                    return self._inflight.get(key)
+                try:
+                    fut = pool.submit(_forecast_worker, symbol, steps)
+                except BrokenProcessPool:
+                    fut = None
+                else:
+                    self._inflight[key] = fut
+            if fut is not None:
+                fut.add_done_callback(lambda f: self._finished(key, f, pool, symbol, steps))
+                return fut
+            self._discard_pool(pool)
+        raise BrokenProcessPool("Could not start a forecast worker")
+
+    def _finished(self, key, fut, pool, symbol, steps):
+        result = error = None
+        try:
+            result, seconds = fut.result()
+            metrics.observe("dsfm_stage_seconds", seconds, stage="forecast_models.pool")
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            print(f"Forecast fit failed for {key}: {error}")
+            if isinstance(e, BrokenProcessPool):
+                self._discard_pool(pool)
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            if error is not None:
+                self._failed[key] = (time.monotonic(), error, symbol, steps)
+            elif result is None:
+                self._empty.add(key)
+        if result is not None:
+            forecast_cache.put(key, result)
+
+    def _failure(self, key):
+        """Error of a recent failed fit (call with the lock held), else None."""
+        failed = self._failed.get(key)
+        if failed is None:
+            return None
+        if time.monotonic() - failed[0] >= self.retry_after:
+            del self._failed[key]
+            return None
+        return failed[1]
+
+    def failure(self, key):
+        with self._lock:
+            return self._failure(key)
+
+    def is_empty(self, key):
+        with self._lock:
+            return key in self._empty
+
+    def pending(self, key):
+        """Future of an in-flight fit for `key`, else None."""
+        with self._lock:
+            return self._inflight.get(key)
+
+
+# Precompute (fit every column on each data change) is opt-in. A single
+# SARIMA search can take several GB, so the pool defaults to one worker.
+FORECAST_PRECOMPUTE = os.getenv("FORECAST_PRECOMPUTE") == "1"
+
+forecast_scheduler = ForecastScheduler(
+    interval=_env_number("FORECAST_PRECOMPUTE_INTERVAL", 60, float),
+    workers=_env_number("FORECAST_WORKERS", 1),
+    retry_after=_env_number("FORECAST_RETRY_AFTER", 60, float),
+)
+_scheduler_lock_file = None
+_scheduler_requested = False
+
+
+def start_forecast_scheduler():
+    """Start the scheduler once per host (first process to take the lock wins)."""
+    global _scheduler_lock_file, _scheduler_requested
+    _scheduler_requested = True
+    if forecast_scheduler.running or multiprocessing.parent_process() is not None:
+        return False
+
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+    if fcntl is not None:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        lock_file = open(os.path.join(CACHE_DIR, "scheduler.lock"), "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        _scheduler_lock_file = lock_file
+
+    forecast_scheduler.start()
+    return True
+
+
+def scheduler_elsewhere():
+    """True when precompute is on but another process on this host runs the scheduler.
+
+    Retries the lock first, so a worker takes over once the owner exits.
+    """
+    if not _scheduler_requested or forecast_scheduler.running:
+        return False
+    return not start_forecast_scheduler()
+
+
+def get_forecast(symbol, steps=30):
+    """Return (forecast, status) without blocking while the scheduler runs.
+
+    status is "fresh" (current data version), "stale" (older version, a
+    refit is queued), "computing" (nothing cached yet) or "failed" (the
+    last fit raised; it is retried after FORECAST_RETRY_AFTER seconds).
+
+    Fits never run inline: they are queued on this process's pool, or, when
+    another worker owns the precompute scheduler, left to that worker and
+    read back from the shared SQLite cache.
+    """
+    col = market_store.snapshot().column(symbol)
+    if col is None or np.count_nonzero(~np.isnan(col)) < 2:
+        return None, None
+
+    key = forecast_cache_key(symbol, steps)
+    cached = forecast_cache.get(key)
+    if cached is not None:
+        return cached, "fresh"
+
+    if forecast_scheduler.is_empty(key):
+        return None, None
+    if not scheduler_elsewhere():
+        try:
+            forecast_scheduler.submit(symbol, steps)
+        except BrokenProcessPool as e:
+            print(f"Could not queue forecast for {symbol}: {e}")
+
+    _, _, steps_part, config_part = key.split("|")
+    stale = forecast_cache.latest(f"{symbol}|", f"|{steps_part}|{config_part}")
+    if stale is not None:
+        return stale, "stale"
+    if forecast_scheduler.failure(key) is not None:
+        return None, "failed"
+    return None, "computing"
+
+
+def forecast_failed_response(symbol, steps=30):
+    """503 for a symbol whose last fit raised, with the error and a Retry-After."""
+    error = forecast_scheduler.failure(forecast_cache_key(symbol, steps)) or "Forecast fit failed"
+    response = jsonify({"symbol": symbol, "status": "failed", "error": error})
+    response.headers["Retry-After"] = str(int(forecast_scheduler.retry_after))
+    return response, 503
+
+
+@app.cli.command("precompute-forecasts")
+def precompute_forecasts_command():
+    """Fit and cache forecasts for every symbol in market_data.csv."""
+    futures = forecast_scheduler.warm()
+    print(f"Fitting {len(futures)} symbols...")
+    wait_futures(futures)
+    forecast_scheduler.stop()
+    print("Done.")
+
+
+def _forecast_payload(symbol, forecast, status):
+    return {
+        "symbol": symbol,
+        "status": status,
+        "forecast_direction": forecast["direction"],
+        "forecast_arima": forecast["arima"],
+        "forecast_sarima": forecast["sarima"],
+        "forecast_garch": forecast["garch"],
+    }
+
+
+@app.route("/api/dsfm/forecast/<symbol>")
+def api_dsfm_forecast(symbol):
+    forecast, status = get_forecast(symbol)
+    if status == "computing":
+        return jsonify({"symbol": symbol, "status": status}), 202
+    if status == "failed":
+        return forecast_failed_response(symbol)
+    if not forecast:
+        return jsonify({"error": "No forecast"}), 404
+
+    return jsonify(_forecast_payload(symbol, forecast, status))
+
+
+# ===========================================================
+#  BATCH FORECAST (many symbols in parallel)
+# ===========================================================
+MAX_BATCH_SYMBOLS = 100
+BATCH_FORECAST_TIMEOUT = _env_number("BATCH_FORECAST_TIMEOUT", 300, float)  # seconds
+
+# Batches get their own pool (never started as a watcher) so they fit in
+# parallel even though the precompute pool defaults to a single worker.
+batch_forecasts = ForecastScheduler(
+    workers=_env_number("BATCH_FORECAST_WORKERS", os.cpu_count() or 1),
+    retry_after=forecast_scheduler.retry_after,
+)
+
+
+def iter_batch_forecasts(symbols, steps=30, timeout=BATCH_FORECAST_TIMEOUT):
+    """Yield one result row per symbol, in completion order.
+
+    Cached forecasts come back first; fits already queued by the
+    scheduler are awaited, the rest are fitted in parallel on the batch
+    pool (which also writes them to the cache).
+    Every row carries its own timing and, on failure, an error message.
+    Fits still running after `timeout` seconds are reported as errors
+    (they keep running and land in the cache).
+    """
+    deadline = time.monotonic() + timeout
+    snap = market_store.snapshot()
+    pending = {}
+
+    for symbol in symbols:
+        if snap.column(symbol) is None:
+            yield {"symbol": symbol, "status": "error", "error": "Symbol not found", "elapsed_ms": 0.0}
+            continue
+
+        key = forecast_cache_key(symbol, steps, snap.version)
+        cached = forecast_cache.get(key)
+        if cached is None:
+            try:
+                fut = forecast_scheduler.pending(key) or \
+                    batch_forecasts.submit(symbol, steps, version=snap.version)
+            except BrokenProcessPool as e:
+                yield {"symbol": symbol, "status": "error", "error": str(e), "elapsed_ms": 0.0}
+                continue
+            if fut is not None:
+                pending[fut] = symbol
+                continue
+            cached = forecast_cache.get(key)  # finished between the two checks
+
+        if cached is None:
+            error = batch_forecasts.failure(key) or forecast_scheduler.failure(key) or "No forecast"
+            yield {"symbol": symbol, "status": "error", "error": error, "elapsed_ms": 0.0}
+        else:
+            row = _forecast_payload(symbol, cached, "fresh")
+            row.update({"cached": True, "elapsed_ms": 0.0})
+            yield row
+
+    done = set()
+    try:
+        for fut in as_completed(pending, timeout=max(deadline - time.monotonic(), 0)):
+            done.add(fut)
+            yield _batch_row(pending[fut], fut)
+    except TimeoutError:
+        for fut, symbol in pending.items():
+            if fut not in done:
+                yield {"symbol": symbol, "status": "error", "elapsed_ms": None,
+                       "error": f"Timed out after {timeout:g}s; the fit continues in the background"}
+
+
+def _batch_row(symbol, fut):
+    try:
+        forecast, seconds = fut.result()
+    except Exception as e:
+        return {"symbol": symbol, "status": "error", "error": str(e) or type(e).__name__, "elapsed_ms": None}
+
+    elapsed_ms = round(seconds * 1000, 1)
+    if forecast is None:
+        return {"symbol": symbol, "status": "error", "error": "No forecast", "elapsed_ms": elapsed_ms}
+    row = _forecast_payload(symbol, forecast, "fresh")
+    row.update({"cached": False, "elapsed_ms": elapsed_ms})
+    return row
+
+
+@app.route("/api/dsfm/forecast/batch", methods=["GET", "POST"])
+def api_dsfm_forecast_batch():
+    """Forecast many symbols at once.
+
+    Symbols come from a JSON body ({"symbols": [...], "steps": 30}) or
+    ?symbols=A,B,C. With ?stream=1 (or Accept: application/x-ndjson) rows
+    are streamed as NDJSON as each fit completes; otherwise one combined
+    JSON document is returned in request order.
+    """
+    body = request.get_json(silent=True)
+    if body is None:
+        body = {}
+    if not isinstance(body, dict):
+        return jsonify({"error": 'JSON body must be an object like {"symbols": [...]}'}), 400
+    symbols = body.get("symbols")
+    if symbols is None:
+        symbols = [x for x in request.args.get("symbols", "").split(",") if x.strip()]
+    if not isinstance(symbols, list) or not symbols:
+        return jsonify({"error": "Provide a non-empty list of symbols"}), 400
+
+    symbols = list(dict.fromkeys(str(x).strip() for x in symbols))
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        return jsonify({"error": f"At most {MAX_BATCH_SYMBOLS} symbols per batch"}), 400
+
+    try:
+        steps = int(body.get("steps", request.args.get("steps", 30)))
+    except (TypeError, ValueError):
+        return jsonify({"error": "steps must be an integer"}), 400
+    if not 1 <= steps <= 365:
+        return jsonify({"error": "steps must be between 1 and 365"}), 400
+
+    stream = request.args.get("stream") == "1" or \
+        request.accept_mimetypes.best == "application/x-ndjson"
+    if stream:
+        def generate():
+            for row in iter_batch_forecasts(symbols, steps):
+                yield dumps_strict(row) + "\n"
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    start = time.perf_counter()
+    rows = {row["symbol"]: row for row in iter_batch_forecasts(symbols, steps)}
+    results = [rows[sym] for sym in symbols]
+    return jsonify({
+        "results": results,
+        "count": len(results),
+        "errors": sum(1 for r in results if r["status"] == "error"),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+    })
+
+
+# ===========================================================
+#  SECTOR (PANEL) FORECASTS
+# ===========================================================
+# One VAR per sector prefix on the members' aligned log returns: a single
+# fit forecasts every member and lets cross-asset lags inform each other.
+SECTOR_VAR_CONFIG = {"maxlags": 5, "ic": "aic", "trend": "c", "window": 750}
+
+
+def sector_of(symbol):
+    return symbol.split("_", 1)[0] if "_" in symbol else "OTHER"
+
+
+def sector_members(snap, sector):
+    return [c for c in snap.columns if sector_of(c) == sector]
+
+
+def fit_sector_var(snap, members, end=None):
+    """VAR on members' log returns over snapshot rows [:end].
+
+    Only rows where every member has a price are used, the last
+    SECTOR_VAR_CONFIG["window"] of them. Returns (fit, returns, last
+    prices, last date).
+    """
+    panel = snap.values[:end, [snap.col_index[c] for c in members]]
+    rows = np.flatnonzero(~np.isnan(panel).any(axis=1))[-(SECTOR_VAR_CONFIG["window"] + 1):]
+    if len(rows) < 100:
+        raise ValueError("Not enough overlapping history for a sector model")
+    panel = panel[rows]
+    returns = np.diff(np.log(panel), axis=0)
+    fit = deps.get("statsmodels").VAR(returns).fit(
+        maxlags=SECTOR_VAR_CONFIG["maxlags"], ic=SECTOR_VAR_CONFIG["ic"], trend=SECTOR_VAR_CONFIG["trend"]
+    )
+    return fit, returns, panel[-1], snap.dates[rows[-1]]
+
+
+def var_forecast_returns(fit, returns, steps):
+    """(steps, n_members) log-return forecast."""
+    return fit.forecast(returns[len(returns) - fit.k_ar:], steps)
+
+
+def sector_cache_key(sector, steps, version):
+    config = json.dumps(SECTOR_VAR_CONFIG, sort_keys=True).encode("utf-8")
+    return f"sector:{sector}|{version}|{steps}|{hashlib.sha1(config).hexdigest()[:12]}"
+
+
+def compute_sector_forecast(snap, sector, members, steps=30):
+    start = time.perf_counter()
+    fit, returns, last_prices, last_date = fit_sector_var(snap, members)
+    prices = last_prices * np.exp(np.cumsum(var_forecast_returns(fit, returns, steps), axis=0))
+    dates = [(last_date + timedelta(days=i + 1)).strftime("%Y-%m-%d") for i in range(steps)]
+
+    return {
+        "sector": sector,
+        "model": f"VAR({fit.k_ar})",
+        "lag_order": int(fit.k_ar),
+        "symbols": members,
+        "observations": int(fit.nobs),
+        "aic": float(fit.aic),
+        "last_date": last_date.strftime("%Y-%m-%d"),
+        "fit_ms": round((time.perf_counter() - start) * 1000, 1),
+        "forecasts": {
+            symbol: {
+                "forecast_direction": "UP" if prices[-1, j] > last_prices[j] else "DOWN",
+                "forecast": [{"date": d, "price": float(p)} for d, p in zip(dates, prices[:, j])],
+            }
+            for j, symbol in enumerate(members)
+        },
+    }
 
 
-@app.route("/api/dsfm/forecast/<symbol>")
-def api_dsfm_forecast(symbol):
-    forecast = forecast_models(symbol)
-    if not forecast:
-        return jsonify({"error": "No forecast"}), 404
+@app.route("/api/dsfm/forecast/sector/<sector>")
+@versioned_response
+def api_dsfm_forecast_sector(sector):
+    """Forecast every member of a sector (FIN, IT, AUTO, ...) from one VAR fit."""
+    snap = market_store.snapshot()
+    sector = sector.strip().rstrip("_").upper()
+    members = sector_members(snap, sector)
+    if not members:
+        return jsonify({"error": f"Unknown sector '{sector}'"}), 404
+    if len(members) < 2:
+        return jsonify({
+            "error": f"Sector '{sector}' has a single symbol; use /api/dsfm/forecast/{members[0]}"
+        }), 400
 
-    return jsonify({
-        "symbol": symbol,
-        "forecast_direction": forecast["direction"],
-        "forecast_arima": forecast["arima"],
-        "forecast_sarima": forecast["sarima"],
-        "forecast_garch": forecast["garch"],
-    })
+    try:
+        steps = int(request.args.get("steps", 30))
+    except ValueError:
+        return jsonify({"error": "steps must be an integer"}), 400
+    if not 1 <= steps <= 365:
+        return jsonify({"error": "steps must be between 1 and 365"}), 400
+
+    key = sector_cache_key(sector, steps, snap.version)
+    result = forecast_cache.get(key)
+    cached = result is not None
+    if not cached:
+        try:
+            with timed("fit.sector_var"):
+                result = compute_sector_forecast(snap, sector, members, steps)
+        except Exception as e:
+            print(f"Sector forecast failed for {sector}: {e}")
+            return jsonify({"error": f"Sector forecast failed: {e}"}), 500
+        forecast_cache.put(key, result)
+
+    return jsonify({**result, "status": "fresh", "cached": cached})
 
 
 # ===========================================================
@@ -418,25 +2570,167 @@ def api_dsfm_forecast(symbol):
 # ===========================================================
 load_dotenv()
 NEWS_API_KEY = os.getenv("NEWSCATCHER_API_KEY")  # make sure .env has this
+NEWS_API_URL = os.getenv("NEWS_API_URL", "https://newsdata.io/api/1/news")  # point at a fake server for tests
+
+
+class NewsUnavailable(Exception):
+    """The news API is rate limiting us / failing and nothing is cached."""
+
+
+class RequestsTransport:
+    """Default news transport: one pooled requests.Session per process."""
+
+    def __init__(self, pool_size=10):
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url, params, timeout):
+        """Return (status code, headers, parsed JSON or None)."""
+        res = self.session.get(url, params=params, timeout=timeout)
+        try:
+            data = res.json()
+        except ValueError:
+            data = None
+        return res.status_code, res.headers, data
+
+
+class NewsClient:
+    """newsdata.io client shared by every request.
+
+    - articles are cached per keyword for `ttl` seconds (LRU bounded)
+    - concurrent calls for the same keyword wait on one in-flight fetch
+    - HTTP 429/5xx or transport errors back off exponentially (honouring
+      Retry-After); when a fetch fails or while backing off, cached
+      articles are served even if expired, otherwise the error (or
+      NewsUnavailable) is raised
+    - the transport is pluggable (anything with get(url, params, timeout))
+    """
+
+    def __init__(self, url, api_key, transport=None, ttl=900, max_entries=512,
+                 timeout=10, base_backoff=5, max_backoff=300):
+        self.url = url
+        self.api_key = api_key
+        self.transport = transport or RequestsTransport()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # keyword -> (fetched_at, articles)
+        self._inflight = {}          # keyword -> Future
+        self._failures = 0
+        self._blocked_until = 0.0
+
+    def _back_off(self, headers):
+        retry_after = (headers or {}).get("Retry-After")
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = min(self.base_backoff * 2 ** self._failures, self.max_backoff)
+        with self._lock:
+            self._failures += 1
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+
+    def _request(self, keyword):
+        params = {
+            "apikey": self.api_key,
+            "q": keyword,
+            "language": "en",
+            "country": "in",
+        }
+        try:
+            with timed("news.http"):
+                status, headers, data = self.transport.get(self.url, params, self.timeout)
+        except Exception:
+            self._back_off(None)
+            raise
+
+        if status == 429 or status >= 500:
+            self._back_off(headers)
+            raise NewsUnavailable(f"News API returned HTTP {status}")
+
+        with self._lock:
+            self._failures = 0
+        if not isinstance(data, dict):
+            return []
+        return data.get("results") or []
+
+    def fetch(self, keyword):
+        """Articles for `keyword` (list of dicts, possibly empty)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(keyword)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._cache.move_to_end(keyword)
+                cache_lookup("news", "hit")
+                return entry[1]
+            if now < self._blocked_until:
+                if entry is not None:
+                    cache_lookup("news", "stale")
+                    return entry[1]
+                cache_lookup("news", "miss")
+                raise NewsUnavailable("News API backing off after rate limit/errors")
+
+            fut = self._inflight.get(keyword)
+            owner = fut is None
+            if owner:
+                fut = Future()
+                self._inflight[keyword] = fut
+
+        if not owner:
+            cache_lookup("news", "coalesced")
+            return fut.result(timeout=self.timeout * 2)
+
+        try:
+            articles = self._request(keyword)
+        except Exception as e:
+            if entry is None:
+                cache_lookup("news", "miss")
+                fut.set_exception(e)
+                raise
+            cache_lookup("news", "stale")  # expired, but better than nothing
+            fut.set_result(entry[1])
+            return entry[1]
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            cache_lookup("news", "miss")
+            with self._lock:
+                self._cache[keyword] = (time.monotonic(), articles)
+                self._cache.move_to_end(keyword)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+            fut.set_result(articles)
+            return articles
+        finally:
+            with self._lock:
+                self._inflight.pop(keyword, None)
+
+
+news_client = NewsClient(
+    NEWS_API_URL,
+    NEWS_API_KEY,
+    ttl=_env_number("NEWS_CACHE_TTL", 900, float),
+)
 
 
 def get_dynamic_sentiment(symbol):
+    with timed("sentiment"):
+        return _dynamic_sentiment(symbol)
+
+
+def _dynamic_sentiment(symbol):
     clean_symbol = symbol.split("_")[-1].upper()
     keyword = SYMBOL_MAP.get(clean_symbol, clean_symbol)
 
-    url = "https://newsdata.io/api/1/news"
-    params = {
-        "apikey": NEWS_API_KEY,
-        "q": keyword,
-        "language": "en",
-        "country": "in",
-    }
-
     try:
-        res = requests.get(url, params=params, timeout=10)
-        data = res.json()
+        articles = news_client.fetch(keyword)
 
-        if "results" not in data or len(data["results"]) == 0:
+        if len(articles) == 0:
             return {
                 "symbol": symbol,
                 "score": 0.0,
@@ -447,13 +2741,18 @@ def get_dynamic_sentiment(symbol):
         sentiments = []
         news_list = []
 
-        for article in data["results"]:
+        texts = [
+            f"{article.get('title', '')} {article.get('description', '') or ''}"
+            for article in articles
+        ]
+        polarities = textblob_scores(texts)
+
+        for article, polarity in zip(articles, polarities):
             title = article.get("title", "")
             desc = article.get("description", "") or ""
             published = article.get("pubDate", "")
 
-            text = f"{title} {desc}"
-            polarity = TextBlob(text).sentiment.polarity
+            polarity = polarity if polarity is not None else 0.0
             sentiments.append(polarity)
 
             news_list.append({
@@ -497,192 +2796,104 @@ def api_dsfm_sentiment(symbol):
 #  MOST BOUGHT STOCK (simple proxy)
 # ===========================================================
 @app.route("/api/most-bought")
+@versioned_response
 def api_most_bought():
-    df = read_timeseries()
-    if df.empty:
-        return jsonify({"most_bought": None})
-
-    last, prev, date = latest_and_prev_prices(df)
-
-    changes = []
-    for sym in last.index:
-        if pd.isna(last[sym]) or pd.isna(prev[sym]):
-            continue
-        pct = (last[sym] - prev[sym]) / prev[sym] * 100
-        changes.append({
-            "symbol": sym,
-            "ltp": float(last[sym]),
-            "pct_change": round(pct, 2)
-        })
-
-    if not changes:
+    daily = daily_snapshot()
+    if daily is None or daily["most_bought"] is None:
         return jsonify({"most_bought": None})
 
-    df_changes = pd.DataFrame(changes)
-    most_bought = df_changes.sort_values("pct_change", ascending=False).iloc[0]
-
+    most_bought = daily["most_bought"]
     return jsonify({
-        "date": date,
+        "date": daily["date"],
         "symbol": most_bought["symbol"],
         "ltp": most_bought["ltp"],
         "pct_change": most_bought["pct_change"]
     })
 
 
-# ========= helpers for market insights =========
-def _pct_change_over_days(df: pd.DataFrame, sym: str, days: int):
-    series = pd.to_numeric(df[sym], errors="coerce").dropna()
-    if len(series) <= days:
-        return None
-
-    latest = series.iloc[-1]
-    past = series.iloc[-(days + 1)]
-    if past == 0 or pd.isna(latest) or pd.isna(past):
-        return None
-
-    return float((latest - past) / past * 100.0)
-
-
 @app.route("/api/market-insights")
+@versioned_response
 def api_market_insights():
-    df = read_timeseries()
-    if df.empty:
+    daily = daily_snapshot()
+    if daily is None:
         return jsonify({"error": "No data"}), 404
 
-    last, prev, last_date = latest_and_prev_prices(df)
-    advancers = decliners = unchanged = 0
-    breadth_rows = []
-
-    for sym in last.index:
-        if pd.isna(last[sym]) or pd.isna(prev[sym]):
-            continue
-
-        change = last[sym] - prev[sym]
-        pct = (change / prev[sym]) * 100.0 if prev[sym] != 0 else 0.0
-
-        if change > 0:
-            advancers += 1
-        elif change < 0:
-            decliners += 1
-        else:
-            unchanged += 1
-
-        breadth_rows.append({"symbol": sym, "pct_change": pct})
-
-    adv_decl_ratio = (advancers / decliners) if decliners != 0 else None
-
-    sector_stats = {}
-    for row in breadth_rows:
-        sym = row["symbol"]
-        pct = row["pct_change"]
-        sector = sym.split("_", 1)[0] if "_" in sym else "OTHER"
-
-        if sector not in sector_stats:
-            sector_stats[sector] = {
-                "sector": sector,
-                "advancers": 0,
-                "decliners": 0,
-                "unchanged": 0,
-                "sum_pct_change": 0.0,
-                "count": 0,
-            }
-
-        stat = sector_stats[sector]
-        if pct > 0:
-            stat["advancers"] += 1
-        elif pct < 0:
-            stat["decliners"] += 1
-        else:
-            stat["unchanged"] += 1
-
-        stat["sum_pct_change"] += pct
-        stat["count"] += 1
-
-    sectors = []
-    for sec, stat in sector_stats.items():
-        avg_move = stat["sum_pct_change"] / stat["count"] if stat["count"] > 0 else 0.0
-        sectors.append({
-            "sector": sec,
-            "advancers": stat["advancers"],
-            "decliners": stat["decliners"],
-            "unchanged": stat["unchanged"],
-            "avg_move": round(avg_move, 2),
-        })
-
-    price_cols = [c for c in df.columns if c != "Date"]
-    momentum_rows = []
-
-    for sym in price_cols:
-        pct_5d = _pct_change_over_days(df, sym, 5)
-        pct_20d = _pct_change_over_days(df, sym, 20)
-        if pct_5d is None or pct_20d is None:
-            continue
-
-        score = 2 * pct_5d + pct_20d
-        momentum_rows.append({
-            "symbol": sym,
-            "pct_5d": round(pct_5d, 2),
-            "pct_20d": round(pct_20d, 2),
-            "momentum_score": round(score, 2),
-        })
-
-    momentum_rows = sorted(momentum_rows, key=lambda x: x["momentum_score"], reverse=True)[:10]
-
     return jsonify({
-        "date": last_date,
-        "breadth": {
-            "advancers": advancers,
-            "decliners": decliners,
-            "unchanged": unchanged,
-            "adv_decl_ratio": adv_decl_ratio,
-        },
-        "sectors": sectors,
-        "momentum": momentum_rows,
+        "date": daily["date"],
+        "breadth": daily["breadth"],
+        "sectors": daily["sectors"],
+        "momentum": daily["momentum"],
     })
 
 
 # ===========================================================
 #  FINAL DECISION ENGINE (history + ARIMA/SARIMA/GARCH + sentiment)
 # ===========================================================
+def decision_signal(direction, sentiment_label):
+    """Simple rule combining forecast direction and news sentiment."""
+    if direction == "UP" and sentiment_label == "POSITIVE":
+        return "BUY"
+    elif direction == "UP" and sentiment_label == "NEGATIVE":
+        return "WAIT"
+    elif direction == "DOWN" and sentiment_label == "NEGATIVE":
+        return "AVOID"
+    return "HOLD"
+
+
 @app.route("/api/dsfm/decision/<symbol>")
 def api_dsfm_decision(symbol):
-    forecast = forecast_models(symbol)
-    if not forecast:
+    forecast, status = get_forecast(symbol)
+    if status == "failed":
+        return forecast_failed_response(symbol)
+    if not forecast and status != "computing":
         return jsonify({"error": "No forecast"}), 404
 
     sentiment = get_dynamic_sentiment(symbol)
     s_label = sentiment["label"]
-    direction = forecast["direction"]
 
     # History for last ~800 days
-    history_df = get_price_series(symbol).tail(800)
-    history = [
-        {"date": d.strftime("%Y-%m-%d"), "price": float(p)}
-        for d, p in zip(history_df["Date"], history_df["Price"])
-    ]
-
-    # Simple rule
-    if direction == "UP" and s_label == "POSITIVE":
-        signal = "BUY"
-    elif direction == "UP" and s_label == "NEGATIVE":
-        signal = "WAIT"
-    elif direction == "DOWN" and s_label == "NEGATIVE":
-        signal = "AVOID"
+    dates, prices = price_history(market_store.snapshot(), symbol, 800)
+    if columnar_requested():
+        history = {"dates": dates, "prices": prices}
+        shape = points_to_columns
     else:
-        signal = "HOLD"
+        history = [{"date": d, "price": p} for d, p in zip(dates, prices.tolist())]
+        shape = list
 
-    return jsonify({
+    if status == "computing":
+        # Forecast still fitting in the background: send what we have
+        return chart_response({
+            "symbol": symbol,
+            "status": status,
+            "signal": None,
+            "forecast_direction": None,
+            "sentiment_label": s_label,
+            "sentiment_score": sentiment["score"],
+            "news": sentiment.get("news", []),
+            "forecast": shape([]),
+            "forecast_arima": shape([]),
+            "forecast_sarima": shape([]),
+            "forecast_garch": shape([]),
+            "history": history,
+        }, 202)
+
+    direction = forecast["direction"]
+
+    signal = decision_signal(direction, s_label)
+
+    return chart_response({
         "symbol": symbol,
+        "status": status,
         "signal": signal,
         "forecast_direction": direction,
         "sentiment_label": s_label,
         "sentiment_score": sentiment["score"],
         "news": sentiment.get("news", []),
 
-        "forecast": forecast["arima"],        # main forecast
-        "forecast_arima": forecast["arima"],
-        "forecast_sarima": forecast["sarima"],
-        "forecast_garch": forecast["garch"],
+        "forecast": shape(forecast["arima"]),        # main forecast
+        "forecast_arima": shape(forecast["arima"]),
+        "forecast_sarima": shape(forecast["sarima"]),
+        "forecast_garch": shape(forecast["garch"]),
         "history": history,
     })
 
@@ -692,15 +2903,17 @@ def api_dsfm_decision(symbol):
 # ===========================================================
 
 @app.route("/api/dsfm/available-symbols")
+@versioned_response
 def api_dsfm_available_symbols():
     """Get list of available symbols from market data CSV."""
     try:
-        df = read_timeseries()
-        if df.empty:
+        snap = market_store.snapshot()
+        if snap.empty:
             return jsonify({"symbols": []})
         
-        # Get all columns except Date
-        symbols = [col for col in df.columns if col != "Date" and not df[col].isna().all()]
+        # Get all columns that have at least one price
+        has_data = ~np.isnan(snap.values).all(axis=0)
+        symbols = [col for col, ok in zip(snap.columns, has_data) if ok]
         
         # Create display names (remove prefix)
         symbol_list = []
@@ -721,35 +2934,355 @@ def api_dsfm_available_symbols():
         return jsonify({"error": str(e), "symbols": []}), 500
 
 
+# ===========================================================
+#  SYMBOL INDEX (resolution + autocomplete, once per data version)
+# ===========================================================
+MAX_SYMBOL_SEARCH = 50
+_NON_ALNUM = re.compile(r"[^0-9A-Z]")
+
+
+def _symbol_key(text):
+    """Upper-case alphanumerics only: "bajaj-auto" -> "BAJAJAUTO", "M&M" -> "MM"."""
+    return _NON_ALNUM.sub("", text.upper())
+
+
+class SymbolIndex:
+    """Maps what users type to CSV columns, built once per snapshot.
+
+    `resolve` tries the exact column, its case-folded form, then the
+    normalised key of the column, of its ticker without the sector prefix
+    (ASIANPAINT -> CDUR_ASIANPAINT) and of its SYMBOL_MAP company name,
+    earliest column first. Only a miss on all of those falls back to a
+    substring scan. `search` serves autocomplete: prefix, then substring
+    matches, and only when neither finds anything, fuzzy (difflib) ones.
+    """
+
+    def __init__(self, snap):
+        self.columns = list(snap.columns)
+        self.exact = set(self.columns)
+        self.casefolded = {}
+        self.tickers = {}
+        self.names = {}
+        keys = {"column": [], "ticker": [], "name": []}
+        for col in self.columns:
+            ticker = col.split("_", 1)[1] if "_" in col else col
+            name = SYMBOL_MAP.get(_symbol_key(ticker))
+            self.tickers[col], self.names[col] = ticker, name
+            self.casefolded.setdefault(col.casefold(), col)
+            keys["column"].append((_symbol_key(col), col))
+            keys["ticker"].append((_symbol_key(ticker), col))
+            if name:
+                keys["name"].append((_symbol_key(name), col))
+
+        self.by_key = {}
+        for kind in ("column", "ticker", "name"):
+            for key, col in keys[kind]:
+                if key:
+                    self.by_key.setdefault(key, col)
+        self._column_keys = keys["column"]
+        self._sorted_keys = sorted(self.by_key)
+
+    def resolve(self, symbol):
+        """Canonical column for `symbol`, or None."""
+        if symbol in self.exact:
+            return symbol
+        col = self.casefolded.get(symbol.casefold())
+        if col is not None:
+            return col
+        key = _symbol_key(symbol)
+        if not key:
+            return None
+        col = self.by_key.get(key)
+        if col is not None:
+            return col
+        for col_key, col in self._column_keys:
+            if key in col_key:
+                return col
+        return None
+
+    def search(self, query, limit=10):
+        """Up to `limit` columns matching `query`, best matches first."""
+        key = _symbol_key(query)
+        if not key:
+            return []
+
+        i = bisect_left(self._sorted_keys, key)
+        prefix = []
+        while i < len(self._sorted_keys) and self._sorted_keys[i].startswith(key):
+            prefix.append(self._sorted_keys[i])
+            i += 1
+        candidates = [(k, "prefix") for k in sorted(prefix, key=len)]
+        candidates += [(k, "contains") for k in self._sorted_keys if key in k and not k.startswith(key)]
+        if not candidates:
+            candidates = [(k, "fuzzy") for k in difflib.get_close_matches(key, self._sorted_keys, n=limit)]
+
+        found = {}
+        for k, match in candidates:
+            col = self.by_key[k]
+            if col not in found:
+                found[col] = match
+                if len(found) == limit:
+                    break
+        return [{"value": col, "display": self.tickers[col], "name": self.names[col], "match": match}
+                for col, match in found.items()]
+
+
+def symbol_index(snap):
+    return snap.derive("symbol_index", SymbolIndex)
+
+
 def find_symbol_in_data(symbol):
     """Find matching symbol in CSV columns, handles various formats."""
-    df = read_timeseries()
-    if df.empty:
+    snap = market_store.snapshot()
+    if snap.empty:
         return None
-    
-    # Direct match
-    if symbol in df.columns:
-        return symbol
-    
-    # Try uppercase
-    symbol_upper = symbol.upper()
-    for col in df.columns:
-        if col.upper() == symbol_upper:
-            return col
-    
-    # Try matching after underscore (e.g., ASIANPAINT matches CDUR_ASIANPAINT)
-    symbol_clean = symbol.replace("_", "").replace("-", "").upper()
-    for col in df.columns:
-        col_clean = col.replace("_", "").replace("-", "").upper()
-        if symbol_clean in col_clean or col_clean.endswith(symbol_clean):
-            return col
-    
-    # Try partial match (symbol at end)
-    for col in df.columns:
-        if col.endswith(symbol) or col.endswith(f"_{symbol}") or col.endswith(f"-{symbol}"):
-            return col
-    
-    return None
+    return symbol_index(snap).resolve(symbol)
+
+
+@app.route("/api/dsfm/symbols/search")
+@versioned_response
+def api_dsfm_symbol_search():
+    """Symbol autocomplete: ?q=asian&limit=10."""
+    query = request.args.get("q", "").strip()
+    try:
+        limit = int(request.args.get("limit", 10))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, MAX_SYMBOL_SEARCH))
+
+    snap = market_store.snapshot()
+    results = [] if snap.empty else symbol_index(snap).search(query, limit)
+    return jsonify({"query": query, "results": results})
+
+# ===========================================================
+#  FINBERT SERVICE (lazy, process-wide, batched inference)
+# ===========================================================
+FINBERT_MODEL_NAME = "ProsusAI/finbert"
+FINBERT_MODEL_REVISION = os.getenv("FINBERT_MODEL_REVISION", "main")
+
+
+class FinBertService:
+    """Loads FinBERT once per process and scores headlines in batches.
+
+    Headlines are tokenized in padded batches and run under
+    torch.inference_mode(). The thread count and optional dynamic int8
+    quantization (CPU only) come from FINBERT_THREADS / FINBERT_QUANTIZE.
+    """
+
+    def __init__(self, model_name, revision="main", batch_size=16, threads=None, quantize=False):
+        self.model_name = model_name
+        self.revision = revision
+        self.batch_size = batch_size
+        self.threads = threads
+        self.quantize = quantize
+        self._lock = threading.Lock()
+        self._tokenizer = None
+        self._model = None
+        self._pos_idx, self._neg_idx = 0, 1  # ProsusAI/finbert: 0=positive, 1=negative, 2=neutral
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                lib = deps.get("finbert")
+                torch = lib.torch
+                with timed("finbert.load"):
+                    if self.threads:
+                        torch.set_num_threads(self.threads)
+                    # Note: first run downloads the model (~440MB)
+                    tokenizer = lib.AutoTokenizer.from_pretrained(self.model_name, revision=self.revision)
+                    model = lib.AutoModelForSequenceClassification.from_pretrained(self.model_name, revision=self.revision)
+                    model.eval()
+                    if self.quantize:
+                        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+                    labels = {str(v).lower(): int(k) for k, v in model.config.id2label.items()}
+                    self._pos_idx = labels.get("positive", 0)
+                    self._neg_idx = labels.get("negative", 1)
+                    self._tokenizer, self._model = tokenizer, model
+        return self._tokenizer, self._model
+
+    @property
+    def version(self):
+        """Identifies the weights for the score cache without loading them."""
+        return f"{self.revision}-int8" if self.quantize else self.revision
+
+    def score(self, texts):
+        """Positive minus negative probability for each text."""
+        tokenizer, model = self._load()
+        torch = deps.get("finbert").torch
+        scores = []
+        with torch.inference_mode(), timed("finbert.score"):
+            for i in range(0, len(texts), self.batch_size):
+                batch = [str(t) for t in texts[i:i + self.batch_size]]
+                inputs = tokenizer(batch, return_tensors="pt", padding=True, truncation=True, max_length=512)
+                probs = torch.nn.functional.softmax(model(**inputs).logits, dim=-1)
+                scores.extend((probs[:, self._pos_idx] - probs[:, self._neg_idx]).tolist())
+        return scores
+
+
+finbert_service = FinBertService(
+    FINBERT_MODEL_NAME,
+    revision=FINBERT_MODEL_REVISION,
+    batch_size=_env_number("FINBERT_BATCH_SIZE", 16),
+    threads=_env_number("FINBERT_THREADS", None),
+    quantize=os.getenv("FINBERT_QUANTIZE", "0") == "1",
+) if deps.available("finbert") else None
+
+
+# ===========================================================
+#  SENTIMENT SCORE CACHE (model, version, text hash) -> score
+# ===========================================================
+try:
+    TEXTBLOB_VERSION = metadata.version("textblob")
+except metadata.PackageNotFoundError:
+    TEXTBLOB_VERSION = "unknown"
+
+
+def _text_hash(text):
+    """Hash of the text after unicode/whitespace normalisation."""
+    normalized = " ".join(unicodedata.normalize("NFKC", str(text)).split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class SentimentScoreStore(SqliteStore):
+    """Persistent headline score cache with an in-memory front.
+
+    Lookups are done in bulk before inference so only unseen headlines
+    reach the model. hits/misses count individual headlines.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS sentiment_scores ("
+        "model TEXT NOT NULL, version TEXT NOT NULL, text_hash TEXT NOT NULL, "
+        "score REAL NOT NULL, PRIMARY KEY (model, version, text_hash))",
+    )
+    LOOKUP_CHUNK = 500
+
+    def __init__(self, path, max_memory=50000):
+        super().__init__(path)
+        self.max_memory = max_memory
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # (model, version, hash) -> score
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, model, version, scores):
+        with self._lock:
+            for text_hash, score in scores.items():
+                self._memory[(model, version, text_hash)] = score
+            while len(self._memory) > self.max_memory:
+                self._memory.popitem(last=False)
+
+    def lookup(self, model, version, hashes):
+        """Return {hash: score} for the hashes we already know."""
+        found = {}
+        with self._lock:
+            for h in hashes:
+                score = self._memory.get((model, version, h))
+                if score is not None:
+                    found[h] = score
+
+        missing = [h for h in set(hashes) if h not in found]
+        from_disk = {}
+        for i in range(0, len(missing), self.LOOKUP_CHUNK):
+            chunk = missing[i:i + self.LOOKUP_CHUNK]
+            rows = self._disk(lambda conn: conn.execute(
+                "SELECT text_hash, score FROM sentiment_scores WHERE model = ? AND version = ? "
+                f"AND text_hash IN ({','.join('?' * len(chunk))})",
+                (model, version, *chunk),
+            ).fetchall()) or []
+            from_disk.update(rows)
+        self._remember(model, version, from_disk)
+        found.update(from_disk)
+
+        with self._lock:
+            hit = sum(1 for h in hashes if h in found)
+            self.hits += hit
+            self.misses += len(hashes) - hit
+        return found
+
+    def store(self, model, version, scores):
+        """Save {hash: score}."""
+        if not scores:
+            return
+        self._remember(model, version, scores)
+        self._disk(lambda conn: conn.executemany(
+            "INSERT OR REPLACE INTO sentiment_scores (model, version, text_hash, score) "
+            "VALUES (?, ?, ?, ?)",
+            [(model, version, h, float(v)) for h, v in scores.items()],
+        ))
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else None,
+                "memory_entries": len(self._memory),
+            }
+
+
+sentiment_scores = SentimentScoreStore(SENTIMENT_CACHE_DB)
+
+
+def cached_scores(model, version, texts, score_fn):
+    """Scores aligned with `texts`; only headlines not cached reach score_fn."""
+    hashes = [_text_hash(t) for t in texts]
+    known = sentiment_scores.lookup(model, version, hashes)
+    hits = sum(1 for h in hashes if h in known)
+    cache_lookup("sentiment", "hit", hits)
+    cache_lookup("sentiment", "miss", len(hashes) - hits)
+
+    todo = {}
+    for h, text in zip(hashes, texts):
+        if h not in known and h not in todo:
+            todo[h] = text
+    if todo:
+        fresh = dict(zip(todo.keys(), score_fn(list(todo.values()))))
+        fresh = {h: v for h, v in fresh.items() if v is not None}
+        sentiment_scores.store(model, version, fresh)
+        known.update(fresh)
+
+    return [known.get(h) for h in hashes]
+
+
+def _textblob_scores(texts):
+    scores = []
+    with timed("textblob.score"):
+        for text in texts:
+            try:
+                scores.append(deps.get("textblob").TextBlob(str(text)).sentiment.polarity)
+            except Exception as e:
+                print(f"TextBlob error: {e}")
+                scores.append(None)
+    return scores
+
+
+def score_headlines(headlines):
+    """Sentiment score per headline: FinBERT when available, else TextBlob.
+
+    The result is aligned with `headlines`; None marks a headline that
+    could not be scored.
+    """
+    if not headlines:
+        return []
+    if finbert_service is not None:
+        try:
+            return cached_scores(FINBERT_MODEL_NAME, finbert_service.version, headlines, finbert_service.score)
+        except Exception as e:
+            print(f"FinBERT error, using TextBlob: {e}")
+    return textblob_scores(headlines)
+
+
+def textblob_scores(texts):
+    """Cached TextBlob polarity per text (None if it could not be scored)."""
+    return cached_scores("textblob", TEXTBLOB_VERSION, texts, _textblob_scores)
+
+
+@app.route("/api/dsfm/sentiment-cache")
+def api_dsfm_sentiment_cache():
+    return jsonify(sentiment_scores.stats())
 
 
 def read_sentiment_data():
@@ -817,16 +3350,13 @@ def api_dsfm_garch_analysis(symbol):
             if len(returns_scaled) < 50:
                 return jsonify({"error": f"Insufficient valid returns after cleaning (got {len(returns_scaled)})"}), 400
             
-            # Create GARCH model
-            garch_mod = arch_model(returns_scaled, vol="Garch", p=1, q=1, mean="Zero")
-            
-            # Fit the model - try with different options
+            # Fit the model (warm-started when only new bars arrived) - try with different options
             try:
-                garch_fit = garch_mod.fit(disp="off")
+                garch_fit = fit_garch(actual_symbol, "garch_scaled", returns_scaled)
             except:
                 # If that fails, try with different options
                 try:
-                    garch_fit = garch_mod.fit(disp="off", options={'maxiter': 100})
+                    garch_fit = fit_garch(actual_symbol, "garch_scaled", returns_scaled, options={'maxiter': 100})
                 except Exception as fit_err:
                     return jsonify({
                         "error": f"GARCH model fitting failed: {str(fit_err)}",
@@ -934,57 +3464,22 @@ def api_dsfm_finbert_analysis():
             }), 400
 
         results = []
-        
+
         # Group by symbol
+        grouped = []
         for symbol, group in df.groupby("symbol"):
             # Filter out empty headlines
             headlines = [h for h in group["headline"].dropna().tolist() if h and str(h).strip()]
-            
-            if not headlines:
-                continue
-            
-            # Use FinBERT if available, otherwise TextBlob
-            if FINBERT_AVAILABLE:
-                try:
-                    # Load FinBERT model (using a financial sentiment model)
-                    # Note: First run will download the model (~500MB)
-                    tokenizer = AutoTokenizer.from_pretrained("ProsusAI/finbert")
-                    model = AutoModelForSequenceClassification.from_pretrained("ProsusAI/finbert")
-                    
-                    sentiments = []
-                    # Process all headlines (no limit for complete analysis)
-                    for headline in headlines:
-                        try:
-                            inputs = tokenizer(str(headline), return_tensors="pt", truncation=True, max_length=512)
-                            outputs = model(**inputs)
-                            probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                            # FinBERT: 0=positive, 1=negative, 2=neutral
-                            sentiment_score = float(probs[0][0] - probs[0][1])  # positive - negative
-                            sentiments.append(sentiment_score)
-                        except Exception as e:
-                            # Fallback to TextBlob for this headline
-                            try:
-                                sentiment_score = TextBlob(str(headline)).sentiment.polarity
-                                sentiments.append(sentiment_score)
-                            except:
-                                continue
-                    
-                    avg_sentiment = np.mean(sentiments) if sentiments else 0.0
-                except Exception as e:
-                    print(f"FinBERT error, using TextBlob: {e}")
-                    try:
-                        sentiments = [TextBlob(str(h)).sentiment.polarity for h in headlines if h]
-                        avg_sentiment = np.mean(sentiments) if sentiments else 0.0
-                    except Exception as e2:
-                        print(f"TextBlob error: {e2}")
-                        avg_sentiment = 0.0
-            else:
-                try:
-                    sentiments = [TextBlob(str(h)).sentiment.polarity for h in headlines if h]
-                    avg_sentiment = np.mean(sentiments) if sentiments else 0.0
-                except Exception as e:
-                    print(f"TextBlob error: {e}")
-                    avg_sentiment = 0.0
+            if headlines:
+                grouped.append((symbol, headlines))
+
+        # Score every headline in one batched pass, then split per symbol
+        all_scores = score_headlines([h for _, headlines in grouped for h in headlines])
+        offset = 0
+        for symbol, headlines in grouped:
+            sentiments = [x for x in all_scores[offset:offset + len(headlines)] if x is not None]
+            offset += len(headlines)
+            avg_sentiment = np.mean(sentiments) if sentiments else 0.0
 
             label = "POSITIVE" if avg_sentiment > 0.1 else ("NEGATIVE" if avg_sentiment < -0.1 else "NEUTRAL")
             
@@ -1003,7 +3498,7 @@ def api_dsfm_finbert_analysis():
             }), 404
         
         return jsonify({
-            "analysis_type": "FinBERT" if FINBERT_AVAILABLE else "TextBlob",
+            "analysis_type": "FinBERT" if finbert_service is not None else "TextBlob",
             "results": results,
             "total_symbols": len(results)
         })
@@ -1018,6 +3513,387 @@ def api_dsfm_finbert_analysis():
         }), 500
 
 
+def build_lstm_model(seq_length, n_features=1):
+    """Two-layer LSTM regressor used by the LSTM endpoints and backtests."""
+    keras = deps.get("tensorflow")
+    model = keras.Sequential([
+        keras.LSTM(50, return_sequences=True, input_shape=(seq_length, n_features)),
+        keras.Dropout(0.2),
+        keras.LSTM(50, return_sequences=False),
+        keras.Dropout(0.2),
+        keras.Dense(1)
+    ])
+    model.compile(optimizer='adam', loss='mse')
+    return model
+
+
+def lstm_rollout(model, windows, steps, forward=None):
+    """Recursive multi-step forecast (scaled) from the last input window(s).
+
+    `windows` is one window (seq_length,) or a batch (n, seq_length) that
+    is rolled forward together. Each step calls the network directly
+    (`forward`, e.g. a compiled tf.function, defaults to model(x)) rather
+    than model.predict, and the window slides along a preallocated buffer
+    instead of being re-appended. Returns (steps,) or (n, steps).
+    """
+    windows = np.asarray(windows, dtype=np.float32)
+    single = windows.ndim == 1
+    windows = np.atleast_2d(windows)
+    n, seq_length = windows.shape
+    if forward is None:
+        forward = lambda x: model(x, training=False)
+
+    buf = np.empty((n, seq_length + steps, 1), dtype=np.float32)
+    buf[:, :seq_length, 0] = windows
+    for t in range(steps):
+        next_pred = forward(buf[:, t:t + seq_length])
+        buf[:, seq_length + t, 0] = np.asarray(next_pred)[:, 0]
+    forecast_scaled = buf[:, seq_length:, 0].astype(np.float64)
+    return forecast_scaled[0] if single else forecast_scaled
+
+
+def create_sequences(data, seq_length=60):
+    """Training windows over `data` as zero-copy strided views.
+
+    `data` is (T,) or (T, n_features), e.g. scaled price next to returns.
+    Returns X of shape (T - seq_length, seq_length, n_features) and y, the
+    next value of the first feature.
+    """
+    data = np.asarray(data)
+    if data.ndim == 1:
+        data = data[:, None]
+    X = sliding_window_view(data[:-1], seq_length, axis=0).transpose(0, 2, 1)
+    return X, data[seq_length:, 0]
+
+
+class SequenceBatches:
+    """Mini-batches of training windows drawn from one or more series.
+
+    Windows stay views from create_sequences and only the current batch is
+    copied out (one fancy index per series), so memory stays flat however
+    long the history or however many symbols are stacked. `start`/`stop`
+    pick a fraction of each series' windows (train/validation splits);
+    iterating reshuffles when `shuffle` is set.
+    """
+
+    def __init__(self, series, seq_length, batch_size=32, start=0.0, stop=1.0, shuffle=False, seed=None):
+        if isinstance(series, np.ndarray):
+            series = [series]
+        self.windows = [create_sequences(s, seq_length) for s in series]
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
+        # (series, window) pairs, series after series
+        parts = []
+        for i, (X, _) in enumerate(self.windows):
+            lo, hi = int(len(X) * start), int(len(X) * stop)
+            parts.append(np.column_stack([np.full(hi - lo, i), np.arange(lo, hi)]))
+        self.index = np.concatenate(parts) if parts else np.empty((0, 2), dtype=np.int64)
+        self.n_features = self.windows[0][0].shape[2] if self.windows else 1
+        self.seq_length = seq_length
+
+    def __len__(self):
+        return -(-len(self.index) // self.batch_size)
+
+    def batch(self, rows):
+        """Copy the windows for (series, window) `rows` into one float32 batch."""
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1, 2)
+        X = np.empty((len(rows), self.seq_length, self.n_features), dtype=np.float32)
+        y = np.empty(len(rows), dtype=np.float32)
+        for i in np.unique(rows[:, 0]):
+            sel = rows[:, 0] == i
+            X_view, y_all = self.windows[i]
+            X[sel] = X_view[rows[sel, 1]]
+            y[sel] = y_all[rows[sel, 1]]
+        return X, y
+
+    def __getitem__(self, b):
+        return self.batch(self.index[b * self.batch_size:(b + 1) * self.batch_size])
+
+    def __iter__(self):
+        index = self._rng.permutation(self.index) if self.shuffle else self.index
+        for b in range(len(self)):
+            yield self.batch(index[b * self.batch_size:(b + 1) * self.batch_size])
+
+    def dataset(self):
+        """tf.data pipeline over the (series, window) index, reshuffled every epoch.
+
+        Only index rows flow through tf.data; each batch is gathered by
+        batch() in one numpy_function call.
+        """
+        tf = deps.get("tensorflow").tf
+        ds = tf.data.Dataset.from_tensor_slices(self.index)
+        if self.shuffle:
+            ds = ds.shuffle(max(len(self.index), 1), seed=self.seed, reshuffle_each_iteration=True)
+
+        def gather(rows):
+            X, y = tf.numpy_function(self.batch, [rows], (tf.float32, tf.float32))
+            X.set_shape((None, self.seq_length, self.n_features))
+            y.set_shape((None,))
+            return X, y
+
+        return ds.batch(self.batch_size).map(gather).prefetch(tf.data.AUTOTUNE)
+
+
+# ===========================================================
+#  LSTM MODEL REGISTRY
+# ===========================================================
+# Networks are trained once per symbol and data version (from the
+# train-lstm command or a background thread) and saved under
+# data/cache/lstm/<symbol>/; requests only load them and run inference.
+LSTM_MODEL_DIR = os.path.join(CACHE_DIR, "lstm")
+LSTM_EPOCHS = _env_number("LSTM_EPOCHS", 10)
+LSTM_SEED = 42
+
+
+class LstmModel:
+    """A trained network plus the scaler range and settings it was trained with."""
+
+    def __init__(self, model, scaler, meta):
+        self.model = model
+        self.scaler = scaler
+        self.meta = meta
+        self._forward = None
+
+    @property
+    def forward(self):
+        """Forward pass compiled once per loaded model, for any batch size."""
+        if self._forward is None:
+            tf = deps.get("tensorflow").tf
+            model = self.model
+            spec = tf.TensorSpec([None, self.meta["seq_length"], 1], tf.float32)
+            self._forward = tf.function(lambda x: model(x, training=False), input_signature=[spec])
+        return self._forward
+
+    def forecast(self, prices, steps=30):
+        """Roll the model forward from the end of `prices` (current data, not the training set)."""
+        seq_length = self.meta["seq_length"]
+        prices_scaled = self.scaler.transform(np.asarray(prices).reshape(-1, 1)).flatten()
+        with timed("lstm.rollout"):
+            forecast_scaled = lstm_rollout(self.model, prices_scaled[-seq_length:], steps, self.forward)
+        return self.scaler.inverse_transform(forecast_scaled.reshape(-1, 1)).flatten()
+
+
+def _lstm_scaler(data_min, data_max):
+    from sklearn.preprocessing import MinMaxScaler
+    return MinMaxScaler(feature_range=(0, 1)).fit(np.array([[data_min], [data_max]]))
+
+
+def train_lstm_model(prices, epochs=LSTM_EPOCHS):
+    """Fit the LSTM on the first 80% of windows, as the endpoint used to per request."""
+    with timed("fit.lstm"):
+        return _train_lstm_model(prices, epochs)
+
+
+def _train_lstm_model(prices, epochs):
+    deps.get("tensorflow").tf.keras.utils.set_random_seed(LSTM_SEED)
+    scaler = _lstm_scaler(float(np.min(prices)), float(np.max(prices)))
+    prices_scaled = scaler.transform(prices.reshape(-1, 1)).flatten()
+
+    seq_length = min(60, len(prices_scaled) // 4)
+    # First 80% of windows for training, its last tenth held out for validation
+    train = SequenceBatches(prices_scaled, seq_length, start=0.0, stop=0.72, shuffle=True, seed=LSTM_SEED)
+    val = SequenceBatches(prices_scaled, seq_length, start=0.72, stop=0.8)
+
+    model = build_lstm_model(seq_length)
+    model.fit(train.dataset(), validation_data=val.dataset(), epochs=epochs, verbose=0)
+
+    errors = []
+    for X, y in SequenceBatches(prices_scaled, seq_length, batch_size=256, stop=0.8):
+        pred = np.asarray(model(X, training=False))[:, 0]
+        errors.append(scaler.inverse_transform(pred.reshape(-1, 1)) - scaler.inverse_transform(y.reshape(-1, 1)))
+    errors = np.concatenate(errors)
+    mse = float(np.mean(errors ** 2))
+    meta = {
+        "seq_length": seq_length,
+        "epochs": epochs,
+        "data_min": float(scaler.data_min_[0]),
+        "data_max": float(scaler.data_max_[0]),
+        "metrics": {
+            "mse": mse,
+            "mae": float(np.mean(np.abs(errors))),
+            "rmse": float(np.sqrt(mse)),
+        },
+    }
+    return LstmModel(model, scaler, meta)
+
+
+class LstmRegistry:
+    """Per-symbol LSTMs on disk, versioned against the market data snapshot.
+
+    <root>/<symbol>/current.json names the live weights file and holds the
+    scaler range, data version and training metrics; it is replaced
+    atomically after the weights are written. Loaded models are kept in
+    memory until a newer current.json appears.
+
+    Training holds <root>/<symbol>/train.lock, so gunicorn workers sharing
+    the directory train a symbol one at a time, and a worker that waited
+    reuses the model another one just saved for the same data version.
+    """
+
+    def __init__(self, root, epochs=LSTM_EPOCHS):
+        self.root = root
+        self.epochs = epochs
+        self._lock = threading.Lock()
+        self._loaded = {}    # symbol -> LstmModel
+        self._training = {}  # symbol -> Future
+        self._executor = None
+
+    def _dir(self, symbol):
+        return os.path.join(self.root, symbol)
+
+    def _current(self, symbol):
+        try:
+            with open(os.path.join(self._dir(symbol), "current.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, symbol):
+        """Latest saved model for `symbol`, or None."""
+        meta = self._current(symbol)
+        if meta is None:
+            return None
+        with self._lock:
+            cached = self._loaded.get(symbol)
+        if cached is not None and cached.meta["weights"] == meta["weights"]:
+            return cached
+
+        try:
+            model = build_lstm_model(meta["seq_length"])
+            model.load_weights(os.path.join(self._dir(symbol), meta["weights"]))
+        except Exception as e:
+            print(f"Failed to load LSTM for {symbol}: {e}")
+            return None
+        entry = LstmModel(model, _lstm_scaler(meta["data_min"], meta["data_max"]), meta)
+        with self._lock:
+            self._loaded[symbol] = entry
+        return entry
+
+    def get(self, symbol):
+        """Return (model, status) without training inline.
+
+        status is "fresh" (trained on the current data version), "stale"
+        (older version, a retrain is queued) or "training" (no model yet).
+        """
+        entry = self.load(symbol)
+        if entry is not None and entry.meta["version"] == market_store.snapshot().version:
+            return entry, "fresh"
+        self.submit(symbol)
+        return entry, ("stale" if entry is not None else "training")
+
+    def submit(self, symbol):
+        """Queue a background training run unless one is already queued."""
+        with self._lock:
+            fut = self._training.get(symbol)
+            if fut is not None:
+                return fut
+            if self._executor is None:
+                # One trainer: TensorFlow already uses every core per fit
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lstm-train")
+            fut = self._executor.submit(self.train, symbol, only_if_stale=True)
+            self._training[symbol] = fut
+        fut.add_done_callback(lambda f: self._finished(symbol, f))
+        return fut
+
+    def _finished(self, symbol, fut):
+        with self._lock:
+            self._training.pop(symbol, None)
+        if fut.exception() is not None:
+            print(f"LSTM training failed for {symbol}: {fut.exception()}")
+
+    @contextmanager
+    def _train_lock(self, symbol):
+        """Exclusive per-symbol lock across processes (flock; no-op without fcntl)."""
+        try:
+            import fcntl
+        except ImportError:
+            fcntl = None
+        d = self._dir(symbol)
+        os.makedirs(d, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(d, "train.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def train(self, symbol, epochs=None, only_if_stale=False):
+        """Train on the current data, save it and make it the live model.
+
+        With only_if_stale, a model already saved for the current data
+        version (e.g. by another worker while this one waited for the
+        lock) is loaded instead of training again.
+        """
+        with self._train_lock(symbol):
+            version = market_store.snapshot().version
+            if only_if_stale:
+                meta = self._current(symbol)
+                if meta is not None and meta["version"] == version:
+                    entry = self.load(symbol)
+                    if entry is not None:
+                        return entry
+
+            prices = get_price_series(symbol)["Price"].to_numpy(dtype=np.float64)
+            if len(prices) < 100:
+                raise ValueError(f"Insufficient data for symbol '{symbol}'")
+
+            entry = train_lstm_model(prices, epochs or self.epochs)
+            trained_at = time.time()
+            entry.meta.update(
+                symbol=symbol,
+                version=version,
+                trained_at=trained_at,
+                weights=f"{version}-{int(trained_at * 1000)}.weights.h5",
+            )
+            self._save(symbol, entry)
+        with self._lock:
+            self._loaded[symbol] = entry
+        return entry
+
+    def _save(self, symbol, entry):
+        """Write weights, then current.json; called with the train lock held."""
+        d = self._dir(symbol)
+        entry.model.save_weights(os.path.join(d, entry.meta["weights"]))
+        _replace_atomic(
+            os.path.join(d, "current.json"),
+            lambda fh: fh.write(json.dumps(entry.meta).encode("utf-8")),
+        )
+        # Only remove weights that current.json no longer names
+        current = self._current(symbol)
+        keep = current["weights"] if current is not None else entry.meta["weights"]
+        for name in os.listdir(d):
+            if name.endswith(".weights.h5") and name != keep:
+                try:
+                    os.remove(os.path.join(d, name))
+                except OSError:
+                    pass
+
+
+lstm_registry = LstmRegistry(LSTM_MODEL_DIR)
+
+
+@app.cli.command("train-lstm")
+@click.option("--symbols", default="", help="Comma-separated columns (default: all).")
+@click.option("--epochs", default=None, type=int, help=f"Training epochs (default: {LSTM_EPOCHS}).")
+def train_lstm_command(symbols, epochs):
+    """Train and save the LSTM of every symbol for the current market data."""
+    if not deps.available("tensorflow"):
+        raise click.ClickException("TensorFlow is not installed")
+    snap = market_store.snapshot()
+    symbols = [s.strip() for s in symbols.split(",") if s.strip()] or list(snap.columns)
+    for i, symbol in enumerate(symbols, 1):
+        try:
+            entry = lstm_registry.train(symbol, epochs)
+            print(f"[{i}/{len(symbols)}] {symbol}: rmse={entry.meta['metrics']['rmse']:.4f}")
+        except Exception as e:
+            print(f"[{i}/{len(symbols)}] {symbol}: failed ({e})")
+
+
 @app.route("/api/dsfm/lstm-analysis/<symbol>")
 def api_dsfm_lstm_analysis(symbol):
     """LSTM time series forecasting."""
@@ -1033,7 +3909,7 @@ def api_dsfm_lstm_analysis(symbol):
 
         prices = s["Price"].values
         
-        if not LSTM_AVAILABLE:
+        if not deps.available("tensorflow"):
             return jsonify({
                 "error": "LSTM not available",
                 "message": "TensorFlow/Keras not installed. Using simple forecast instead.",
@@ -1041,82 +3917,33 @@ def api_dsfm_lstm_analysis(symbol):
                 "forecast": [float(prices[-1])] * 30
             }), 200
 
-        # Prepare data for LSTM
-        def create_sequences(data, seq_length=60):
-            X, y = [], []
-            for i in range(len(data) - seq_length):
-                X.append(data[i:i+seq_length])
-                y.append(data[i+seq_length])
-            return np.array(X), np.array(y)
-
-        # Normalize data
-        from sklearn.preprocessing import MinMaxScaler
-        scaler = MinMaxScaler(feature_range=(0, 1))
-        prices_scaled = scaler.fit_transform(prices.reshape(-1, 1)).flatten()
-
-        seq_length = min(60, len(prices_scaled) // 4)
-        if len(prices_scaled) < seq_length + 30:
-            return jsonify({"error": "Insufficient data for LSTM"}), 404
-
-        X, y = create_sequences(prices_scaled, seq_length)
-        
-        # Split data
-        train_size = int(len(X) * 0.8)
-        X_train, X_test = X[:train_size], X[train_size:]
-        y_train, y_test = y[:train_size], y[train_size:]
-
-        # Reshape for LSTM
-        X_train = X_train.reshape((X_train.shape[0], X_train.shape[1], 1))
-        X_test = X_test.reshape((X_test.shape[0], X_test.shape[1], 1))
-
-        # Build LSTM model
-        model = Sequential([
-            LSTM(50, return_sequences=True, input_shape=(seq_length, 1)),
-            Dropout(0.2),
-            LSTM(50, return_sequences=False),
-            Dropout(0.2),
-            Dense(1)
-        ])
-        model.compile(optimizer='adam', loss='mse')
-
-        # Train model (use minimal epochs for speed)
-        model.fit(X_train, y_train, epochs=10, batch_size=32, verbose=0, validation_split=0.1)
+        lstm, status = lstm_registry.get(actual_symbol)
+        if lstm is None:
+            # First request for this symbol: the model trains in the background
+            return jsonify({
+                "symbol": symbol,
+                "actual_symbol": actual_symbol,
+                "model_type": "LSTM",
+                "status": status,
+                "forecast": [],
+            }), 202
 
-        # Forecast next 30 days
-        last_sequence = prices_scaled[-seq_length:].reshape(1, seq_length, 1)
-        forecast_scaled = []
-        current_seq = last_sequence.copy()
-
-        for _ in range(30):
-            next_pred = model.predict(current_seq, verbose=0)
-            forecast_scaled.append(next_pred[0, 0])
-            # Update sequence
-            current_seq = np.append(current_seq[:, 1:, :], next_pred.reshape(1, 1, 1), axis=1)
-
-        # Inverse transform
-        forecast = scaler.inverse_transform(np.array(forecast_scaled).reshape(-1, 1)).flatten()
-
-        # Calculate metrics
-        train_pred = model.predict(X_train, verbose=0)
-        train_pred = scaler.inverse_transform(train_pred)
-        train_actual = scaler.inverse_transform(y_train.reshape(-1, 1))
-        mse = float(np.mean((train_pred - train_actual) ** 2))
-        mae = float(np.mean(np.abs(train_pred - train_actual)))
+        forecast = lstm.forecast(prices, 30)
+        metrics = lstm.meta["metrics"]
 
         return jsonify({
             "symbol": symbol,
             "actual_symbol": actual_symbol,
             "model_type": "LSTM",
+            "status": status,
+            "model_version": lstm.meta["version"],
+            "trained_at": lstm.meta["trained_at"],
             "forecast": [float(p) for p in forecast],
             "forecast_dates": [
                 (s["Date"].iloc[-1] + timedelta(days=i+1)).strftime("%Y-%m-%d")
                 for i in range(30)
             ],
-            "metrics": {
-                "mse": mse,
-                "mae": mae,
-                "rmse": float(np.sqrt(mse))
-            },
+            "metrics": metrics,
             "current_price": float(prices[-1]),
             "forecast_price": float(forecast[-1]),
             "expected_change_pct": float((forecast[-1] - prices[-1]) / prices[-1] * 100)
@@ -1158,8 +3985,7 @@ def api_dsfm_combined_analysis(symbol):
                         results["garch"] = {"error": "Insufficient or constant returns data"}
                     else:
                         try:
-                            garch_mod = arch_model(returns * 100, vol="Garch", p=1, q=1, mean="Zero")
-                            garch_fit = garch_mod.fit(disp="off")
+                            garch_fit = fit_garch(actual_symbol, "garch_scaled", returns * 100)
                             forecast = garch_fit.forecast(horizon=30, reindex=False)
                             forecast_variance = forecast.variance.values[-1]
                             forecast_volatility = np.sqrt(forecast_variance) / 100
@@ -1192,52 +4018,19 @@ def api_dsfm_combined_analysis(symbol):
         # LSTM Analysis
         try:
             s = get_price_series(actual_symbol)
-            if not s.empty and len(s) >= 100 and LSTM_AVAILABLE:
+            if not s.empty and len(s) >= 100 and deps.available("tensorflow"):
                 prices = s["Price"].values
-                from sklearn.preprocessing import MinMaxScaler
-                scaler = MinMaxScaler(feature_range=(0, 1))
-                prices_scaled = scaler.fit_transform(prices.reshape(-1, 1)).flatten()
-                seq_length = min(60, len(prices_scaled) // 4)
-                
-                if len(prices_scaled) >= seq_length + 30:
-                    def create_sequences(data, seq_len):
-                        X, y = [], []
-                        for i in range(len(data) - seq_len):
-                            X.append(data[i:i+seq_len])
-                            y.append(data[i+seq_len])
-                        return np.array(X), np.array(y)
-                    
-                    X, y = create_sequences(prices_scaled, seq_length)
-                    train_size = int(len(X) * 0.8)
-                    X_train = X[:train_size].reshape((train_size, seq_length, 1))
-                    y_train = y[:train_size]
-                    
-                    model = Sequential([
-                        LSTM(50, return_sequences=True, input_shape=(seq_length, 1)),
-                        Dropout(0.2),
-                        LSTM(50, return_sequences=False),
-                        Dropout(0.2),
-                        Dense(1)
-                    ])
-                    model.compile(optimizer='adam', loss='mse')
-                    model.fit(X_train, y_train, epochs=5, batch_size=32, verbose=0)
-                    
-                    last_sequence = prices_scaled[-seq_length:].reshape(1, seq_length, 1)
-                    forecast_scaled = []
-                    current_seq = last_sequence.copy()
-                    for _ in range(30):
-                        next_pred = model.predict(current_seq, verbose=0)
-                        forecast_scaled.append(next_pred[0, 0])
-                        current_seq = np.append(current_seq[:, 1:, :], next_pred.reshape(1, 1, 1), axis=1)
-                    
-                    forecast = scaler.inverse_transform(np.array(forecast_scaled).reshape(-1, 1)).flatten()
+                lstm, status = lstm_registry.get(actual_symbol)
+                if lstm is not None:
+                    forecast = lstm.forecast(prices, 30)
                     results["lstm"] = {
+                        "status": status,
                         "forecast": [float(p) for p in forecast],
                         "current_price": float(prices[-1]),
                         "forecast_price": float(forecast[-1])
                     }
                 else:
-                    results["lstm"] = {"error": "Insufficient data for LSTM"}
+                    results["lstm"] = {"status": status, "error": "LSTM model is training, retry shortly"}
             else:
                 results["lstm"] = {"error": "LSTM not available or insufficient data"}
         except Exception as e:
@@ -1254,25 +4047,9 @@ def api_dsfm_combined_analysis(symbol):
                 matching = df[df["symbol"].str.contains(variant, case=False, na=False)]
                 if not matching.empty:
                     headlines = matching["headline"].tolist()
-                    if FINBERT_AVAILABLE:
-                        try:
-                            tokenizer = AutoTokenizer.from_pretrained("ProsusAI/finbert")
-                            model = AutoModelForSequenceClassification.from_pretrained("ProsusAI/finbert")
-                            sentiments = []
-                            for h in headlines[:10]:  # Limit to 10 for speed
-                                inputs = tokenizer(h, return_tensors="pt", truncation=True, max_length=512)
-                                outputs = model(**inputs)
-                                probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                                sentiment_score = float(probs[0][0] - probs[0][1])
-                                sentiments.append(sentiment_score)
-                            avg_sentiment = np.mean(sentiments) if sentiments else 0
-                        except:
-                            sentiments = [TextBlob(h).sentiment.polarity for h in headlines[:10]]
-                            avg_sentiment = np.mean(sentiments) if sentiments else 0
-                    else:
-                        sentiments = [TextBlob(h).sentiment.polarity for h in headlines[:10]]
-                        avg_sentiment = np.mean(sentiments) if sentiments else 0
-                    
+                    sentiments = [x for x in score_headlines(headlines[:10]) if x is not None]  # Limit to 10 for speed
+                    avg_sentiment = np.mean(sentiments) if sentiments else 0
+
                     symbol_sentiment = {
                         "symbol": symbol,
                         "avg_sentiment": round(avg_sentiment, 3),
@@ -1295,8 +4072,431 @@ def api_dsfm_combined_analysis(symbol):
         return jsonify({"error": str(e)}), 500
 
 
+# ===========================================================
+#  WALK-FORWARD BACKTEST
+# ===========================================================
+BACKTEST_DIR = os.path.join(CACHE_DIR, "backtests")
+BACKTEST_MODELS = ("arima", "sarima", "garch", "lstm", "var")
+BACKTEST_SENTIMENTS = ("POSITIVE", "NEGATIVE")  # NEUTRAL always maps to HOLD
+# Position taken over the test block for each decision signal. AVOID is
+# scored as a short so that correctly staying out of a fall counts.
+SIGNAL_POSITIONS = {"BUY": 1.0, "WAIT": 0.0, "HOLD": 0.0, "AVOID": -1.0}
+
+
+def walk_forward_folds(n_obs, horizon=30, folds=5, min_train=250, mode="expanding", window=750):
+    """(train_start, train_end) index pairs for the last `folds` test blocks.
+
+    Each test block is prices[train_end:train_end + horizon]; blocks are
+    back to back and end at the last observation. "expanding" trains on
+    everything before the block, "rolling" on the last `window` prices.
+    """
+    if mode not in ("expanding", "rolling"):
+        raise ValueError(f"Unknown backtest mode '{mode}'")
+    ends = range(n_obs - horizon, min_train - 1, -horizon)
+    out = []
+    for end in list(ends)[:folds][::-1]:
+        start = 0 if mode == "expanding" else max(0, end - window)
+        out.append((start, end))
+    return out
+
+
+def _lstm_fold_forecast(train_prices, horizon, epochs=5):
+    """LSTM trained on the fold's training prices only (scaler included)."""
+    return train_lstm_model(train_prices, epochs).forecast(train_prices, horizon)
+
+
+def _sector_fold_returns(symbol, end, horizon):
+    """Symbol's log-return forecast from its sector VAR fitted on data before the fold."""
+    snap = market_store.snapshot()
+    members = sector_members(snap, sector_of(symbol))
+    if len(members) < 2:
+        raise ValueError("Single-symbol sector")
+    # `end` counts the symbol's own prices; convert it to a snapshot row
+    end_row = np.flatnonzero(~np.isnan(snap.column(symbol)))[end - 1] + 1
+    fit, returns, _, _ = fit_sector_var(snap, members, end_row)
+    return var_forecast_returns(fit, returns, horizon)[:, members.index(symbol)]
+
+
+def _backtest_scores(p0, predicted, actual):
+    """RMSE/MAE/directional accuracy and decision-rule P&L for one forecast path."""
+    err = predicted - actual
+    scores = {
+        "rmse": float(np.sqrt(np.mean(err ** 2))),
+        "mae": float(np.mean(np.abs(err))),
+    }
+    if np.allclose(predicted, p0):
+        # Flat path (e.g. a zero-mean ARIMA): no direction to score
+        scores.update(direction=None, directional_accuracy=None, signal_pnl=None)
+        return scores
+
+    direction = "UP" if predicted[-1] > p0 else "DOWN"
+    block_return = float(actual[-1] / p0 - 1)
+    scores.update(
+        direction=direction,
+        directional_accuracy=float(np.mean(np.sign(predicted - p0) == np.sign(actual - p0))),
+        # Headline history is not stored, so the rule is scored once per sentiment
+        signal_pnl={
+            label: SIGNAL_POSITIONS[decision_signal(direction, label)] * block_return
+            for label in BACKTEST_SENTIMENTS
+        },
+    )
+    return scores
+
+
+def backtest_fold(symbol, fold, start, end, horizon, models):
+    """Runs in a pool process: refit every model on one fold and score it.
+
+    Fits are cold on purpose (no model_states warm start), so folds are
+    independent and the live refit state is left alone.
+    """
+    prices = get_price_series(symbol)["Price"].to_numpy(dtype=np.float64)
+    train, actual = prices[start:end], prices[end:end + horizon]
+    p0 = train[-1]
+    r_values = np.diff(np.log(train))
+
+    result = {"symbol": symbol, "fold": fold, "train_start": start, "train_end": end,
+              "horizon": horizon, "models": {}}
+    for name in models:
+        t0 = time.perf_counter()
+        try:
+            if name in ("arima", "sarima"):
+                model = deps.get("pmdarima").auto_arima(
+                    r_values,
+                    **FORECAST_MODEL_CONFIG[name],
+                    suppress_warnings=True,
+                    error_action="ignore"
+                )
+                predicted = p0 * np.exp(np.cumsum(model.predict(n_periods=horizon)))
+                scores = _backtest_scores(p0, np.asarray(predicted), actual)
+            elif name == "garch":
+                garch_fit = fit_garch_model(r_values * 100)
+                sigma = np.sqrt(garch_fit.forecast(horizon=horizon).variance.values[-1]) / 100
+                realized = np.abs(np.diff(np.log(np.concatenate(([p0], actual)))))
+                # Zero-mean model: no price path of its own, only volatility is scored
+                scores = {"rmse": None, "mae": None, "direction": None,
+                          "directional_accuracy": None, "signal_pnl": None,
+                          "vol_rmse": float(np.sqrt(np.mean((sigma - realized) ** 2)))}
+            elif name == "var":
+                predicted = p0 * np.exp(np.cumsum(_sector_fold_returns(symbol, end, horizon)))
+                scores = _backtest_scores(p0, predicted, actual)
+            elif name == "lstm":
+                if not deps.available("tensorflow"):
+                    raise RuntimeError("TensorFlow not installed")
+                scores = _backtest_scores(p0, _lstm_fold_forecast(train, horizon), actual)
+            else:
+                raise ValueError(f"Unknown model '{name}'")
+        except Exception as e:
+            scores = {"error": str(e)}
+        scores["fit_seconds"] = time.perf_counter() - t0
+        result["models"][name] = scores
+    return result
+
+
+def summarize_backtest(rows):
+    """Average the fold scores per model, and per (symbol, model)."""
+    groups = {}
+    for row in rows:
+        for name, scores in row["models"].items():
+            for key in (name, f"{row['symbol']}|{name}"):
+                groups.setdefault(key, []).append(scores)
+
+    def mean(values):
+        values = [v for v in values if v is not None]
+        return float(np.mean(values)) if values else None
+
+    summary = {"models": {}, "symbols": {}}
+    for key, folds in groups.items():
+        ok = [s for s in folds if "error" not in s]
+        entry = {
+            "folds": len(folds),
+            "errors": len(folds) - len(ok),
+            "rmse": mean([s["rmse"] for s in ok]),
+            "mae": mean([s["mae"] for s in ok]),
+            "directional_accuracy": mean([s["directional_accuracy"] for s in ok]),
+            "vol_rmse": mean([s.get("vol_rmse") for s in ok]),
+            "fit_seconds": mean([s["fit_seconds"] for s in folds]),
+        }
+        pnl = [s["signal_pnl"] for s in ok if s["signal_pnl"] is not None]
+        entry["signal_pnl"] = {
+            label: float(np.sum([p[label] for p in pnl])) for label in BACKTEST_SENTIMENTS
+        } if pnl else None
+        if "|" in key:
+            symbol, name = key.split("|")
+            summary["symbols"].setdefault(symbol, {})[name] = entry
+        else:
+            summary["models"][key] = entry
+    return summary
+
+
+class BacktestRun:
+    """One walk-forward run, checkpointed to data/cache/backtests/<run_id>.jsonl.
+
+    The run id hashes the data version, symbols, models and fold layout,
+    so rerunning the same command resumes: (symbol, fold) pairs already
+    in the checkpoint are not refitted.
+    """
+
+    def __init__(self, symbols, models, horizon=30, folds=5, min_train=250,
+                 mode="expanding", window=750):
+        self.snap = market_store.snapshot()
+        self.symbols = list(symbols)
+        self.models = list(models)
+        self.params = {"horizon": horizon, "folds": folds, "min_train": min_train,
+                       "mode": mode, "window": window}
+        spec = json.dumps({
+            "version": self.snap.version,
+            "symbols": self.symbols,
+            "models": self.models,
+            "config": _config_hash(),
+            **self.params,
+        }, sort_keys=True).encode("utf-8")
+        self.run_id = hashlib.sha1(spec).hexdigest()[:12]
+        self.path = os.path.join(BACKTEST_DIR, f"{self.run_id}.jsonl")
+
+    def tasks(self):
+        for symbol in self.symbols:
+            col = self.snap.column(symbol)
+            if col is None:
+                continue
+            n_obs = int(np.count_nonzero(~np.isnan(col)))
+            for fold, (start, end) in enumerate(walk_forward_folds(n_obs, **self.params)):
+                yield symbol, fold, start, end
+
+    def completed(self):
+        return {(row["symbol"], row["fold"]) for row in load_backtest(self.run_id)}
+
+    def run(self, workers=None, progress=None):
+        """Fit the missing folds on a process pool, appending each result as it lands."""
+        done = self.completed()
+        pending = [t for t in self.tasks() if (t[0], t[1]) not in done]
+        os.makedirs(BACKTEST_DIR, exist_ok=True)
+        if pending:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            try:
+                futures = {
+                    pool.submit(backtest_fold, symbol, fold, start, end,
+                                self.params["horizon"], self.models): (symbol, fold)
+                    for symbol, fold, start, end in pending
+                }
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for fut in as_completed(futures):
+                        try:
+                            row = fut.result()
+                        except Exception as e:
+                            print(f"Backtest fold {futures[fut]} failed: {e}")
+                            continue
+                        f.write(json.dumps(row) + "\n")
+                        f.flush()
+                        if progress is not None:
+                            progress(row)
+            finally:
+                pool.shutdown(cancel_futures=True)
+
+        summary = summarize_backtest(load_backtest(self.run_id))
+        summary.update(run_id=self.run_id, version=self.snap.version, models_run=self.models, **self.params)
+        _replace_atomic(
+            os.path.join(BACKTEST_DIR, f"{self.run_id}.summary.json"),
+            lambda fh: fh.write(json.dumps(summary).encode("utf-8")),
+        )
+        return summary
+
+
+def load_backtest(run_id):
+    """Checkpointed fold rows of a run (a torn last line is ignored)."""
+    path = os.path.join(BACKTEST_DIR, f"{run_id}.jsonl")
+    rows = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    pass
+    return rows
+
+
+@app.cli.command("backtest")
+@click.option("--symbols", default="", help="Comma-separated columns (default: all).")
+@click.option("--models", default="arima,sarima,garch,lstm", show_default=True)
+@click.option("--horizon", default=30, show_default=True)
+@click.option("--folds", default=5, show_default=True)
+@click.option("--min-train", default=250, show_default=True)
+@click.option("--mode", type=click.Choice(["expanding", "rolling"]), default="expanding", show_default=True)
+@click.option("--window", default=750, show_default=True, help="Training length in rolling mode.")
+@click.option("--workers", default=None, type=int, help="Pool size (default: CPU count).")
+def backtest_command(symbols, models, horizon, folds, min_train, mode, window, workers):
+    """Walk-forward backtest of the forecast models and the decision rule."""
+    snap = market_store.snapshot()
+    symbols = [s.strip() for s in symbols.split(",") if s.strip()] or list(snap.columns)
+    models = [m.strip().lower() for m in models.split(",") if m.strip()]
+    unknown = set(models) - set(BACKTEST_MODELS)
+    if unknown:
+        raise click.BadParameter(f"unknown models: {', '.join(sorted(unknown))}", param_hint="--models")
+
+    bt = BacktestRun(symbols, models, horizon, folds, min_train, mode, window)
+    total = sum(1 for _ in bt.tasks())
+    done = len(bt.completed())
+    print(f"Backtest {bt.run_id}: {total} folds, {done} already checkpointed")
+
+    def progress(row):
+        nonlocal done
+        done += 1
+        print(f"[{done}/{total}] {row['symbol']} fold {row['fold']}")
+
+    summary = bt.run(workers=workers, progress=progress)
+    for name, entry in summary["models"].items():
+        print(f"{name:>7}: rmse={entry['rmse']} mae={entry['mae']} vol_rmse={entry['vol_rmse']} "
+              f"dir_acc={entry['directional_accuracy']} pnl={entry['signal_pnl']} "
+              f"fit={entry['fit_seconds']:.2f}s")
+    print(f"Results: {bt.path}")
+
+
+@app.route("/api/dsfm/backtest/<run_id>")
+def api_dsfm_backtest(run_id):
+    """Summary of a finished (or the partial results of a running) backtest."""
+    if not run_id.isalnum():
+        return jsonify({"error": "Invalid run id"}), 400
+    summary_path = os.path.join(BACKTEST_DIR, f"{run_id}.summary.json")
+    if os.path.exists(summary_path):
+        with open(summary_path, encoding="utf-8") as f:
+            return jsonify(json.load(f))
+    rows = load_backtest(run_id)
+    if not rows:
+        return jsonify({"error": "Unknown backtest"}), 404
+    summary = summarize_backtest(rows)
+    summary.update(run_id=run_id, partial=True)
+    return jsonify(summary)
+
+
+# ===========================================================
+#  HEALTH, READINESS AND PRE-WARM
+# ===========================================================
+# /healthz only says the process is up. /readyz turns 200 once market data
+# is loaded and the PREWARM libraries (PREWARM=1 for every installed one,
+# or a list such as PREWARM=pmdarima,arch) have been imported by a
+# background thread, so a new worker can take traffic before TensorFlow
+# or torch are ever needed.
+PREWARM = os.getenv("PREWARM", "")
+STARTUP_BUDGET_SECONDS = _env_number("STARTUP_BUDGET_SECONDS", 2.0, float)
+
+_prewarm_names = []
+_prewarm_done = threading.Event()
+
+
+def prewarm_names(spec):
+    if spec in ("", "0"):
+        return []
+    if spec == "1":
+        return [name for name in deps.names if deps.available(name)]
+    names = [n.strip() for n in spec.split(",") if n.strip()]
+    unknown = [n for n in names if n not in deps.names]
+    if unknown:
+        print(f"PREWARM: ignoring unknown libraries {', '.join(unknown)}")
+    return [n for n in names if n in deps.names]
+
+
+def _prewarm(names):
+    try:
+        market_store.snapshot()
+        for name in names:
+            try:
+                deps.get(name)
+            except DependencyUnavailable:
+                pass
+    finally:
+        _prewarm_done.set()
+
+
+def start_prewarm(spec=PREWARM):
+    """Import the requested model libraries in a background thread (main process only)."""
+    names = prewarm_names(spec)
+    if not names or _prewarm_names or multiprocessing.parent_process() is not None:
+        return False
+    _prewarm_names.extend(names)
+    threading.Thread(target=_prewarm, args=(names,), name="prewarm", daemon=True).start()
+    return True
+
+
+@app.route("/healthz")
+def healthz():
+    return jsonify({"status": "ok"})
+
+
+@app.route("/readyz")
+def readyz():
+    snap = market_store.snapshot()
+    warming = bool(_prewarm_names) and not _prewarm_done.is_set()
+    ready = not snap.empty and not warming
+    return jsonify({
+        "status": "ready" if ready else "starting",
+        "market_data_version": snap.version,
+        "prewarm": {"libraries": _prewarm_names, "done": not warming},
+        "dependencies": deps.status(),
+    }), (200 if ready else 503)
+
+
+STARTUP_PROBE = """\
+import json, resource, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+status = app.app.test_client().get("/api/nifty").status_code
+t2 = time.perf_counter()
+print(json.dumps({
+    "import_seconds": t1 - t0,
+    "first_request_seconds": t2 - t1,
+    "status": status,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules": sorted(m for m in sys.argv[1:] if m in sys.modules),
+}))
+"""
+
+
+@app.cli.command("startup-benchmark")
+@click.option("--runs", default=3, type=int, help="Cold starts to time.")
+@click.option("--budget", default=STARTUP_BUDGET_SECONDS, type=float,
+              help="Fail when the median time to the first response exceeds this (seconds).")
+def startup_benchmark_command(runs, budget):
+    """Time a cold import of the app plus its first /api/nifty request.
+
+    Fails when it takes longer than the budget or when a model library
+    (TensorFlow, torch, statsmodels, ...) gets imported at startup.
+    """
+    env = dict(os.environ, FORECAST_PRECOMPUTE="0", PREWARM="0")
+    results = []
+    for i in range(1, runs + 1):
+        proc = subprocess.run([sys.executable, "-c", STARTUP_PROBE, *deps.packages],
+                              cwd=BASE_DIR or None, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise click.ClickException(f"Startup probe failed:\n{proc.stderr.strip()}")
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        results.append(r)
+        print(f"run {i}: import {r['import_seconds']:.2f}s, first request "
+              f"{r['first_request_seconds'] * 1000:.0f} ms (HTTP {r['status']}), "
+              f"max RSS {r['max_rss_mb']:.0f} MB")
+
+    total = statistics.median(r["import_seconds"] + r["first_request_seconds"] for r in results)
+    print(f"median time to first response: {total:.2f}s (budget {budget:.2f}s)")
+    eager = sorted({m for r in results for m in r["heavy_modules"]})
+    if eager:
+        raise click.ClickException(f"Model libraries imported at startup: {', '.join(eager)}")
+    if total > budget:
+        raise click.ClickException(f"Startup took {total:.2f}s, over the {budget:.2f}s budget")
+
+
 # ===========================================================
 #  RUN SERVER
 # ===========================================================
+# Opt in with FORECAST_PRECOMPUTE=1 (and PREWARM=...)
+if __name__ != "__main__":
+    if FORECAST_PRECOMPUTE:
+        start_forecast_scheduler()
+    start_prewarm()
+
 if __name__ == "__main__":
+    # With the debug reloader only the serving child should precompute / pre-warm
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        if FORECAST_PRECOMPUTE:
+            start_forecast_scheduler()
+        start_prewarm()
     app.run(debug=True, host="0.0.0.0", port=8000)
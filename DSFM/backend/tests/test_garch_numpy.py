@@ -0,0 +1,61 @@
+"""Parity of the numpy GARCH(1,1) engine with arch on the bundled market data."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+arch = pytest.importorskip("arch")
+app = pytest.importorskip("app")
+
+COLUMNS = ["FIN_HDFCBANK", "IT_INFY", "OILGAS_ONGC", "METAL_HINDALCO"]
+
+
+def _returns(column):
+    prices = pd.read_csv(app.DATA_CSV, usecols=[column])[column].dropna().to_numpy(dtype=np.float64)
+    return np.diff(np.log(prices)) * 100
+
+
+@pytest.fixture(scope="module", params=COLUMNS)
+def fits(request):
+    r = _returns(request.param)
+    reference = arch.arch_model(r, **app.FORECAST_MODEL_CONFIG["garch"]).fit(disp="off")
+    return r, app.fit_garch_numpy(r), reference
+
+
+def test_params_match_arch(fits):
+    _, ours, reference = fits
+    np.testing.assert_allclose(ours.params["omega"], reference.params["omega"], rtol=0.05, atol=1e-4)
+    np.testing.assert_allclose(ours.params[["alpha[1]", "beta[1]"]], reference.params[["alpha[1]", "beta[1]"]], atol=0.01)
+
+
+def test_loglikelihood_matches_arch(fits):
+    _, ours, reference = fits
+    # Same likelihood, so the numpy optimum can only be marginally below arch's
+    assert ours.loglikelihood == pytest.approx(reference.loglikelihood, abs=0.5)
+    assert ours.nobs == reference.nobs
+
+
+def test_variance_forecast_matches_arch(fits):
+    _, ours, reference = fits
+    ours_var = ours.forecast(horizon=30).variance
+    ref_var = reference.forecast(horizon=30).variance
+    assert ours_var.shape == (1, 30)
+    assert list(ours_var.columns) == list(ref_var.columns)
+    assert list(ours_var.index) == list(ref_var.index)
+    np.testing.assert_allclose(ours_var.values[-1], ref_var.values[-1], rtol=0.05)
+
+
+def test_warm_start_reaches_same_optimum(fits):
+    r, ours, _ = fits
+    warm = app.fit_garch_numpy(r, starting_values=ours.params.to_numpy())
+    assert warm.loglikelihood == pytest.approx(ours.loglikelihood, abs=1e-3)
+
+
+@pytest.mark.parametrize("r", [np.zeros(300), np.array([]), np.array([0.1, np.nan, 0.2])])
+def test_degenerate_returns_raise(r):
+    with pytest.raises(ValueError, match="Constant returns"):
+        app.fit_garch_numpy(r)
@@ -0,0 +1,118 @@
+"""NewsClient caching, coalescing and backoff against a fake transport."""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+app = pytest.importorskip("app")
+
+
+class FakeTransport:
+    """Answers with `status` (and `headers`) and counts calls per keyword."""
+
+    def __init__(self, status=200, headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self.calls = []
+        self.gate = None  # threading.Event to hold requests in flight
+
+    def get(self, url, params, timeout):
+        self.calls.append(params["q"])
+        if self.gate is not None:
+            self.gate.wait(5)
+        if isinstance(self.status, Exception):
+            raise self.status
+        return self.status, self.headers, {"results": [{"title": f"{params['q']} {len(self.calls)}"}]}
+
+
+def client(transport, **kwargs):
+    return app.NewsClient("http://news.test", "key", transport=transport, **kwargs)
+
+
+def test_cached_within_ttl():
+    transport = FakeTransport()
+    news = client(transport, ttl=60)
+    first = news.fetch("TCS")
+    assert news.fetch("TCS") == first
+    assert transport.calls == ["TCS"]
+
+
+def test_refetched_after_ttl():
+    transport = FakeTransport()
+    news = client(transport, ttl=0.01)
+    news.fetch("TCS")
+    time.sleep(0.02)
+    assert news.fetch("TCS") == [{"title": "TCS 2"}]
+    assert transport.calls == ["TCS", "TCS"]
+
+
+def test_lru_bound():
+    transport = FakeTransport()
+    news = client(transport, max_entries=2)
+    for keyword in ("A", "B", "C", "A"):
+        news.fetch(keyword)
+    assert transport.calls == ["A", "B", "C", "A"]
+
+
+def test_concurrent_fetches_coalesce():
+    transport = FakeTransport()
+    transport.gate = threading.Event()
+    news = client(transport)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(news.fetch("INFY"))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    transport.gate.set()
+    for t in threads:
+        t.join()
+    assert transport.calls == ["INFY"]
+    assert results == [[{"title": "INFY 1"}]] * 4
+
+
+@pytest.mark.parametrize("failure", [429, 503, ConnectionError("reset")])
+def test_stale_served_when_refresh_fails(failure):
+    transport = FakeTransport()
+    news = client(transport, ttl=0.01)
+    cached = news.fetch("TCS")
+    time.sleep(0.02)
+    transport.status = failure
+    assert news.fetch("TCS") == cached
+
+
+def test_error_raised_when_nothing_cached():
+    news = client(FakeTransport(status=429))
+    with pytest.raises(app.NewsUnavailable):
+        news.fetch("TCS")
+
+
+def test_backoff_honours_retry_after():
+    transport = FakeTransport(status=429, headers={"Retry-After": "60"})
+    news = client(transport)
+    with pytest.raises(app.NewsUnavailable):
+        news.fetch("TCS")
+    transport.status = 200
+    with pytest.raises(app.NewsUnavailable, match="backing off"):
+        news.fetch("INFY")
+    assert transport.calls == ["TCS"]
+
+
+def test_backoff_grows_and_expires():
+    transport = FakeTransport(status=500)
+    news = client(transport, base_backoff=0.2)
+    with pytest.raises(app.NewsUnavailable):
+        news.fetch("TCS")
+    time.sleep(0.25)
+    with pytest.raises(app.NewsUnavailable):
+        news.fetch("TCS")  # second failure: 0.4s backoff
+    time.sleep(0.25)
+    with pytest.raises(app.NewsUnavailable, match="backing off"):
+        news.fetch("TCS")
+    time.sleep(0.2)
+    transport.status = 200
+    assert news.fetch("TCS") == [{"title": "TCS 3"}]
+    assert transport.calls == ["TCS", "TCS", "TCS"]
@@ -0,0 +1,45 @@
+"""Streamed payloads (SSE, NDJSON) must stay valid JSON with non-finite values."""
+import json
+import math
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+app = pytest.importorskip("app")
+
+PAYLOAD = {
+    "movers": {"gainers": [{"symbol": "X", "pct_change": math.inf}]},
+    "quotes": {"Y": {"ltp": np.float64("nan"), "change": -math.inf, "change_pct": 1.5}},
+    "path": (1.0, float("nan")),
+}
+
+
+def _strict_loads(text):
+    def reject(token):
+        raise ValueError(f"invalid JSON token {token}")
+    return json.loads(text, parse_constant=reject)
+
+
+def test_json_safe_replaces_non_finite():
+    assert app._json_safe(PAYLOAD) == {
+        "movers": {"gainers": [{"symbol": "X", "pct_change": None}]},
+        "quotes": {"Y": {"ltp": None, "change": None, "change_pct": 1.5}},
+        "path": [1.0, None],
+    }
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_sse_event_is_strict_json(monkeypatch, use_orjson):
+    if use_orjson and app.orjson is None:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(app, "orjson", None)
+    event = app._sse("market", PAYLOAD, "v1")
+    data = next(line for line in event.splitlines() if line.startswith("data: "))
+    decoded = _strict_loads(data[len("data: "):])
+    assert decoded["movers"]["gainers"][0]["pct_change"] is None
+    assert decoded["quotes"]["Y"]["change_pct"] == 1.5
@@ -0,0 +1,30 @@
+"""Symbol resolution and autocomplete over the bundled market data."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+app = pytest.importorskip("app")
+
+
+@pytest.fixture(scope="module")
+def index():
+    return app.symbol_index(app.market_store.snapshot())
+
+
+def test_prefix_hit_has_no_fuzzy_extras(index):
+    results = index.search("asian")
+    assert [(r["value"], r["match"]) for r in results] == [("CDUR_ASIANPAINT", "prefix")]
+
+
+def test_fuzzy_only_when_nothing_else_matches(index):
+    results = index.search("asain")
+    assert results and {r["match"] for r in results} == {"fuzzy"}
+    assert "CDUR_ASIANPAINT" in [r["value"] for r in results]
+
+
+def test_resolve_ticker_without_sector_prefix(index):
+    assert index.resolve("ASIANPAINT") == "CDUR_ASIANPAINT"
+    assert index.resolve("asianpaint") == "CDUR_ASIANPAINT"
@@ -1,12 +1,15 @@
+// Latest movers pushed by the market stream
+let latestMovers = null;
+
 // Market Indices Updates
-async function updateMarketIndices() {
+async function updateMarketIndices(pushedNifty) {
     if (typeof window.API === 'undefined') {
         console.warn('API not loaded yet');
         return;
     }
     
     try {
-        const niftyData = await window.API.getNifty();
+        const niftyData = pushedNifty || await window.API.getNifty();
         const niftyElement = document.getElementById('nifty');
         
         if (niftyElement) {
@@ -52,7 +55,7 @@ async function updateMarketMovers(type) {
     }
     
     try {
-        const data = await window.API.getMarketMovers();
+        const data = latestMovers || await window.API.getMarketMovers();
         const stocks = type === 'gainers' ? data.gainers : data.losers;
         const stockPanels = document.querySelectorAll('.mover-stock');
         
@@ -135,20 +138,26 @@ document.querySelector('.user-dropdown')?.addEventListener('click', () => {
     console.log('User dropdown clicked');
 });
 
+// Market data is pushed by the server whenever it changes
+function subscribeToMarket() {
+    window.API.subscribeMarket({
+        onNifty: updateMarketIndices,
+        onMovers: (movers) => {
+            latestMovers = movers;
+            const activeTab = document.querySelector('.mover-tab.active');
+            updateMarketMovers(activeTab ? activeTab.dataset.tab : 'gainers');
+        }
+    });
+}
+
 // Initialize
 if (typeof window.API !== 'undefined') {
-    updateMarketIndices();
-    updateMarketMovers('gainers');
-    
-    // Update market indices every 10 seconds
-    setInterval(updateMarketIndices, 10000);
+    subscribeToMarket();
 } else {
     // Wait for API to load
     window.addEventListener('load', () => {
         if (typeof window.API !== 'undefined') {
-            updateMarketIndices();
-            updateMarketMovers('gainers');
-            setInterval(updateMarketIndices, 10000);
+            subscribeToMarket();
         }
     });
 }
@@ -350,6 +350,12 @@ function displayLstmResults(data) {
         return;
     }
 
+    if (data.status === 'training') {
+        content.innerHTML = `<div class="error-message">The LSTM model for ${data.actual_symbol || data.symbol} is being trained. Try again in a minute.</div>`;
+        document.getElementById('lstmSection').style.display = 'block';
+        return;
+    }
+
     const html = `
         <div class="metric-grid">
             <div class="metric-card">
@@ -1,12 +1,12 @@
-// Market Indices Updates with Live Data
-async function updateMarketIndices() {
+// Market Indices Updates with Live Data (or pushed by the market stream)
+async function updateMarketIndices(pushedNifty) {
     if (typeof window.API === 'undefined') {
         console.warn('API not loaded yet');
         return;
     }
     
     try {
-        const niftyData = await window.API.getNifty();
+        const niftyData = pushedNifty || await window.API.getNifty();
         const niftyElement = document.getElementById('nifty');
         
         if (niftyElement) {
@@ -213,8 +213,8 @@ async function updatePortfolioTable() {
     }
 }
 
-// Update Gainers and Losers
-async function updateGainersLosers() {
+// Update Gainers and Losers (movers may be pushed by the market stream)
+async function updateGainersLosers(pushedMovers) {
     const gainersBody = document.getElementById('gainersBody');
     const losersBody = document.getElementById('losersBody');
     
@@ -224,7 +224,7 @@ async function updateGainersLosers() {
     }
     
     try {
-        const data = await window.API.getMarketMovers();
+        const data = pushedMovers || await window.API.getMarketMovers();
         
         if (gainersBody && data.gainers.length > 0) {
             gainersBody.innerHTML = '';
@@ -286,18 +286,22 @@ window.addEventListener('resize', () => {
     drawChart();
 });
 
+// NIFTY and movers are pushed by the server whenever market data changes.
+// Every event is a new data version, so holdings are revalued with it.
+function subscribeToMarket() {
+    window.API.subscribeMarket({
+        onNifty: (nifty) => {
+            updateMarketIndices(nifty);
+            updatePortfolioTable();
+        },
+        onMovers: updateGainersLosers
+    });
+}
+
 // Initialize
 if (typeof window.API !== 'undefined') {
     initPerformanceChart();
-    updateGainersLosers();
-    updatePortfolioTable();
-    updateMarketIndices();
-    
-    // Update market indices every 10 seconds
-    setInterval(updateMarketIndices, 10000);
-    
-    // Update portfolio table every 30 seconds
-    setInterval(updatePortfolioTable, 30000);
+    subscribeToMarket();
     
     // Update chart data every 60 seconds
     setInterval(async () => {
@@ -319,11 +323,7 @@ if (typeof window.API !== 'undefined') {
     window.addEventListener('load', () => {
         if (typeof window.API !== 'undefined') {
             initPerformanceChart();
-            updateGainersLosers();
-            updatePortfolioTable();
-            updateMarketIndices();
-            setInterval(updateMarketIndices, 10000);
-            setInterval(updatePortfolioTable, 30000);
+            subscribeToMarket();
         }
     });
 }
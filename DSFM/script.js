@@ -10,10 +10,10 @@ const moverFilters = document.querySelectorAll('.mover-filter');
 const moverCardsContainer = document.querySelector('.moverset-grid');
 const segmentSelect = document.querySelector('.segment-select');
 
-// Load market movers from API
-async function loadMarketMovers() {
+// Load market movers from API (or use movers pushed by the market stream)
+async function loadMarketMovers(pushedMovers) {
     try {
-        const data = await window.API.getMarketMovers();
+        const data = pushedMovers || await window.API.getMarketMovers();
         moverTableData.gainers = data.gainers.map(stock => ({
             symbol: stock.symbol,
             ltp: `₹${stock.ltp.toLocaleString('en-IN', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}`,
@@ -102,11 +102,12 @@ marketTabs.forEach(tab => {
     });
 });
 
-// Load market movers on page load
+// Movers and the NIFTY ticker are pushed by the server whenever market data changes
 if (typeof window.API !== 'undefined') {
-    loadMarketMovers();
-    // Refresh every 30 seconds
-    setInterval(loadMarketMovers, 30000);
+    window.API.subscribeMarket({
+        onMovers: loadMarketMovers,
+        onNifty: updateTicker
+    });
 }
 
 moverFilters.forEach(filter => {
@@ -123,12 +124,12 @@ moverFilters.forEach(filter => {
 // ----- Ticker animation (simple marquee) -----
 const tickerBar = document.querySelector('.ticker-bar');
 
-// Update ticker with NIFTY data from API
-async function updateTicker() {
+// Update ticker with NIFTY data from API (or pushed by the market stream)
+async function updateTicker(pushedNifty) {
     if (!tickerBar) return;
     
     try {
-        const niftyData = await window.API.getNifty();
+        const niftyData = pushedNifty || await window.API.getNifty();
         const tickerItems = tickerBar.querySelectorAll('.ticker-item');
         
         if (tickerItems.length > 0) {
@@ -150,11 +151,7 @@ async function updateTicker() {
 }
 
 if (tickerBar) {
-    // Update ticker on load and periodically
-    if (typeof window.API !== 'undefined') {
-        updateTicker();
-        setInterval(updateTicker, 10000); // Update every 10 seconds
-    }
+    // NIFTY updates arrive through subscribeMarket above
     
     // wrap children into track
     const track = document.createElement('div');
@@ -14,12 +14,13 @@ const watchlistData = {
     watchlist2: []
 };
 
-// Load stock data from API
-async function loadStockData(symbol) {
-    if (typeof window.API === 'undefined') return null;
-    
-    try {
-        const data = await window.API.getStock(symbol);
+// Store a quote (same fields as /api/stock) in stockData
+function applyQuote(symbol, data) {
+    if (stockData[symbol]) {
+        stockData[symbol].current = data.latest_value;
+        stockData[symbol].change = data.change;
+        stockData[symbol].change_pct = data.change_pct;
+    } else {
         stockData[symbol] = {
             base: data.latest_value,
             current: data.latest_value,
@@ -27,10 +28,19 @@ async function loadStockData(symbol) {
             change: data.change,
             change_pct: data.change_pct
         };
-        return stockData[symbol];
+    }
+    return stockData[symbol];
+}
+
+// Load quotes for many symbols with one request
+async function loadStockData(symbols) {
+    if (typeof window.API === 'undefined') return;
+
+    try {
+        const quotes = await window.API.getQuotes(symbols);
+        Object.entries(quotes).forEach(([symbol, data]) => applyQuote(symbol, data));
     } catch (error) {
-        console.error(`Failed to load stock data for ${symbol}:`, error);
-        return null;
+        console.error('Failed to load stock data:', error);
     }
 }
 
@@ -63,7 +73,7 @@ async function loadWatchlistData() {
         
         // Load stock data for all symbols
         const allSymbols = [...new Set([...watchlistData.mystocks, ...watchlistData.nifty50].map(s => s.name))];
-        await Promise.all(allSymbols.map(symbol => loadStockData(symbol)));
+        await loadStockData(allSymbols);
         
         // Re-render watchlist
         const activeTab = document.querySelector('.watchlist-tab.active');
@@ -84,15 +94,15 @@ let currentSelectedStock = 'NIFTY';
 let chartData = [];
 let chartCtx = null;
 
-// Update Market Indices
-async function updateMarketIndices() {
+// Update Market Indices (NIFTY may be pushed by the market stream)
+async function updateMarketIndices(pushedNifty) {
     if (typeof window.API === 'undefined') {
         console.warn('API not loaded yet');
         return;
     }
     
     try {
-        const niftyData = await window.API.getNifty();
+        const niftyData = pushedNifty || await window.API.getNifty();
         marketData.nifty.base = niftyData.nifty_value;
         marketData.nifty.current = niftyData.nifty_value;
         
@@ -114,48 +124,31 @@ async function updateMarketIndices() {
     }
 }
 
-// Update Stock Prices
-async function updateStockPrices() {
-    if (typeof window.API === 'undefined') {
-        console.warn('API not loaded yet');
-        return;
-    }
-    
-    // Get all symbols from watchlist
-    const allSymbols = [...new Set([
-        ...watchlistData.mystocks.map(s => s.name),
-        ...watchlistData.nifty50.map(s => s.name)
-    ])];
-    
-    // Update stock data for all symbols
-    await Promise.all(allSymbols.map(async (symbol) => {
-        try {
-            const data = await window.API.getStock(symbol);
-            if (stockData[symbol]) {
-                stockData[symbol].current = data.latest_value;
-                stockData[symbol].change = data.change;
-                stockData[symbol].change_pct = data.change_pct;
-            } else {
-                stockData[symbol] = {
-                    base: data.latest_value,
-                    current: data.latest_value,
-                    name: symbol,
-                    change: data.change,
-                    change_pct: data.change_pct
-                };
-            }
-        } catch (error) {
-            console.error(`Failed to update stock price for ${symbol}:`, error);
-        }
-    }));
+// Apply streamed quotes (ltp/change/change_pct) for symbols on the watchlist
+function applyPushedQuotes(changed) {
+    const listed = new Set([...watchlistData.mystocks, ...watchlistData.nifty50].map(s => s.name));
+    let updated = false;
+    Object.entries(changed).forEach(([symbol, q]) => {
+        if (!listed.has(symbol)) return;
+        applyQuote(symbol, { latest_value: q.ltp, change: q.change, change_pct: q.change_pct });
+        updated = true;
+    });
     
-    // Re-render watchlist with updated prices
     const activeTab = document.querySelector('.watchlist-tab.active');
-    if (activeTab) {
+    if (updated && activeTab) {
         renderWatchlist(activeTab.dataset.tab);
     }
 }
 
+// NIFTY and quotes are pushed by the server whenever market data changes
+function subscribeToMarket() {
+    window.API.subscribeMarket({
+        onNifty: updateMarketIndices,
+        onQuotes: applyPushedQuotes,
+        symbols: () => [...new Set([...watchlistData.mystocks, ...watchlistData.nifty50].map(s => s.name))]
+    });
+}
+
 // Render Watchlist
 function renderWatchlist(key = 'mystocks', searchQuery = '') {
     let rows = watchlistData[key] || [];
@@ -489,14 +482,8 @@ if (searchInput) {
 // Initialize
 if (typeof window.API !== 'undefined') {
     loadWatchlistData();
-    updateMarketIndices();
     initChart();
-    
-    // Update market indices every 10 seconds
-    setInterval(updateMarketIndices, 10000);
-    
-    // Update stock prices every 30 seconds
-    setInterval(updateStockPrices, 30000);
+    subscribeToMarket();
     
     // Update chart every 60 seconds
     setInterval(async () => {
@@ -510,10 +497,8 @@ if (typeof window.API !== 'undefined') {
     window.addEventListener('load', () => {
         if (typeof window.API !== 'undefined') {
             loadWatchlistData();
-            updateMarketIndices();
             initChart();
-            setInterval(updateMarketIndices, 10000);
-            setInterval(updateStockPrices, 30000);
+            subscribeToMarket();
         }
     });
 }